@@ -0,0 +1,203 @@
+# accumulators.py
+"""
+Mergeable streaming accumulators for analytics over unbounded trial streams.
+
+Every accumulator updates in O(1) amortized time per value, keeps bounded
+memory and can be merged with another of the same shape, so workers or
+sessions can each keep one and combine them later. analytics.binomial_test
+and earth_movers_distance accept these in place of full score arrays;
+kl_divergence and js_divergence switch to their smoothed binned estimator.
+"""
+import math
+import random
+
+import numpy as np
+
+
+class CountAccumulator:
+    """Correct/total counts for the binomial test."""
+
+    def __init__(self, correct=0, total=0):
+        self.correct = correct
+        self.total = total
+
+    def update(self, correct):
+        self.correct += int(bool(correct))
+        self.total += 1
+
+    def update_many(self, correct):
+        correct = np.asarray(correct)
+        self.correct += int(np.count_nonzero(correct))
+        self.total += len(correct)
+
+    def merge(self, other):
+        self.correct += other.correct
+        self.total += other.total
+        return self
+
+    @property
+    def accuracy(self):
+        return self.correct / self.total if self.total else 0.0
+
+
+class Histogram:
+    """Fixed-bin histogram over [low, high]; out-of-range values land in the edge bins."""
+
+    def __init__(self, bins=20, low=0.0, high=100.0):
+        self.bins = bins
+        self.low = float(low)
+        self.high = float(high)
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def _index(self, values):
+        idx = ((np.asarray(values, dtype=float) - self.low) * (self.bins / (self.high - self.low))).astype(np.int64)
+        return np.clip(idx, 0, self.bins - 1)
+
+    def update(self, value):
+        self.counts[int(self._index([value])[0])] += 1
+
+    def update_many(self, values):
+        self.counts += np.bincount(self._index(values), minlength=self.bins)
+
+    def merge(self, other):
+        if (other.bins, other.low, other.high) != (self.bins, self.low, self.high):
+            raise ValueError("Cannot merge histograms with different bin edges")
+        self.counts += other.counts
+        return self
+
+    @property
+    def edges(self):
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch: a stack of compactors where an item at level h stands for
+    2**h inputs. Memory is O(k log(n/k)); rank error is roughly 1.7/k.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [[]]
+        self._rng = random.Random(seed)
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _size(self):
+        return sum(len(level) for level in self.levels)
+
+    def _max_size(self):
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for h, level in enumerate(self.levels):
+                if len(level) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append([])
+                    level.sort()
+                    # Promote every other item; an odd leftover stays at this level
+                    keep = [level.pop()] if len(level) % 2 else []
+                    self.levels[h + 1].extend(level[self._rng.randint(0, 1)::2])
+                    self.levels[h] = keep
+                    break
+
+    def update(self, value):
+        self.levels[0].append(float(value))
+        self.n += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=float).ravel().tolist()
+        self.levels[0].extend(values)
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, level in enumerate(other.levels):
+            self.levels[h].extend(level)
+        self.n += other.n
+        self._compress()
+        return self
+
+    def weighted_values(self):
+        """(values, weights) pairs summarizing every input seen."""
+        values = np.array([v for level in self.levels for v in level], dtype=float)
+        weights = np.array([2 ** h for h, level in enumerate(self.levels) for _ in level], dtype=float)
+        return values, weights
+
+    def quantile(self, q):
+        values, weights = self.weighted_values()
+        if not len(values):
+            return float("nan")
+        order = np.argsort(values)
+        cum = np.cumsum(weights[order])
+        return float(values[order][np.searchsorted(cum, q * cum[-1], side="left").clip(0, len(cum) - 1)])
+
+
+class ScoreAccumulator:
+    """Per-source score summary: histogram for binned KL/JS, quantile sketch for EMD."""
+
+    def __init__(self, bins=20, low=0.0, high=100.0, k=200):
+        self.histogram = Histogram(bins, low, high)
+        self.sketch = QuantileSketch(k)
+
+    def update(self, value):
+        self.histogram.update(value)
+        self.sketch.update(value)
+
+    def update_many(self, values):
+        self.histogram.update_many(values)
+        self.sketch.update_many(values)
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+        return self
+
+
+class TrialAccumulator:
+    """
+    Everything the report metrics need from a stream of trials.
+    AI and persona scores are binned over their own ranges (0–100 and 0–1), so
+    bin i of both histograms covers the same relative position on each scale.
+    """
+
+    def __init__(self, bins=20, ai_range=(0.0, 100.0), persona_range=(0.0, 1.0), k=200):
+        self.counts = CountAccumulator()
+        self.ai = ScoreAccumulator(bins, *ai_range, k=k)
+        self.persona = ScoreAccumulator(bins, *persona_range, k=k)
+
+    def update(self, trial):
+        self.counts.update(trial["correct"])
+        self.ai.update(trial["ai_score"])
+        self.persona.update(trial["persona_score"])
+
+    def update_many(self, df):
+        self.counts.update_many(df["correct"])
+        self.ai.update_many(df["ai_score"])
+        self.persona.update_many(df["persona_score"])
+
+    def merge(self, other):
+        self.counts.merge(other.counts)
+        self.ai.merge(other.ai)
+        self.persona.merge(other.persona)
+        return self
+
+    @property
+    def correct(self):
+        return self.counts.correct
+
+    @property
+    def total(self):
+        return self.counts.total
@@ -1,12 +1,26 @@
 # ai_mock.py
+import json
+
 import numpy as np
-from personas import _base_score, _clip
+import pandas as pd
+from personas import _base_score, _clip, _n_rows
+from matcher import PRESTIGE, BRAND
+from instrumentation import timed
+import seeding
+
+
+# Key of the default per-uid noise, shared by the scalar and batch scorers
+_NOISE_KEY = "ai_mock"
 
-def ai_mock_score(resume_json):
+
+def ai_mock_score(resume_json, rng=None):
     """
-    Mock black-box scoring. 
+    Mock black-box scoring.
     Has subtle correlations with prestige schools and brand employers.
     Swappable with a real model API call to return a numeric score (0–100).
+    rng: Generator (or seeding.RowStream) for the noise; when None, a draw
+    keyed by the resume's uid (its content when it has none), so a resume
+    always gets the same score for a given config.RNG_SEED.
     """
     base = _base_score(resume_json)
 
@@ -15,15 +29,89 @@ def ai_mock_score(resume_json):
     employer = resume_json.get("jobs", [{}])[0].get("employer", "").lower()
 
     # Prestige school boost
-    prestige_bonus = 10 if any(k in school for k in
-                                ["harvard", "stanford", "mit", "yale", "princeton"]) else 0
+    prestige_bonus = 10 if PRESTIGE(school) else 0
 
     # Big brand employer boost
-    brand_bonus = 8 if any(k in employer for k in
-                            ["google", "facebook", "amazon", "apple", "netflix", "microsoft", "meta"]) else 0
+    brand_bonus = 8 if BRAND(employer) else 0
 
     # Small random noise to make it "black-boxy"
-    noise = np.random.normal(0, 4)
+    if rng is None:
+        uid = resume_json.get("uid")
+        if uid is None:
+            uid = json.dumps(resume_json, sort_keys=True, default=str)
+        noise = 4 * seeding.uid_normal(uid, _NOISE_KEY)
+    else:
+        noise = rng.normal(0, 4)
 
     # Return final clipped score
     return _clip(base + prestige_bonus + brand_bonus + noise)
+
+
+def _first_field(entries, field):
+    return [e[0].get(field, "") if isinstance(e, list) and e else "" for e in entries]
+
+
+def _nonempty(values):
+    return np.fromiter((bool(v) for v in values), dtype=bool, count=len(values))
+
+
+def _batch_columns(table):
+    """
+    Resolve school, employer and the _base_score presence flags from a table.
+    Accepts nested resume records (education/jobs lists) or the flat columns
+    of a models.ResumeTable (school/employer categoricals, skills bitmask).
+    """
+    n = _n_rows(table)
+
+    if "education" in table:
+        school = _first_field(table["education"], "school")
+        has_education = _nonempty(table["education"])
+    elif "school" in table:
+        school = table["school"]
+        has_education = pd.Series(table["school"]).notna().to_numpy()
+    else:
+        school, has_education = [""] * n, np.zeros(n, dtype=bool)
+
+    if "jobs" in table:
+        employer = _first_field(table["jobs"], "employer")
+        has_jobs = _nonempty(table["jobs"])
+    elif "employer" in table:
+        employer = table["employer"]
+        has_jobs = pd.Series(table["employer"]).notna().to_numpy()
+    else:
+        employer, has_jobs = [""] * n, np.zeros(n, dtype=bool)
+
+    if "skills" not in table:
+        has_skills = np.zeros(n, dtype=bool)
+    elif np.issubdtype(np.asarray(table["skills"]).dtype, np.integer):
+        has_skills = np.asarray(table["skills"]) != 0
+    else:
+        has_skills = _nonempty(table["skills"])
+
+    return school, employer, has_education, has_jobs, has_skills
+
+
+@timed("ai_mock.ai_mock_score_batch", rows="arg")
+def ai_mock_score_batch(table, rng=None):
+    """
+    Vectorized ai_mock_score over a DataFrame or dict of columns.
+    Keyword checks run once per distinct school/employer and the noise is a single
+    draw of len(table) samples, so with the same rng state the result equals
+    [ai_mock_score(r, rng) for r in rows]. Pass seeding.RowStream(...).at(offset)
+    to make a chunk's noise independent of how the input was chunked. With
+    rng None and a uid column, each row gets ai_mock_score's per-uid default
+    noise, so the defaults agree too; without uids it falls back to
+    seeding.RowStream("ai_mock") from row 0.
+    """
+    school, employer, has_education, has_jobs, has_skills = _batch_columns(table)
+
+    base = 50.0 + 5 * has_education + 5 * has_jobs + 5 * has_skills
+    prestige_bonus = np.where(PRESTIGE.match_many(school), 10, 0)
+    brand_bonus = np.where(BRAND.match_many(employer), 8, 0)
+    if rng is None and "uid" in table:
+        noise = 4 * seeding.uid_normals(table["uid"], _NOISE_KEY)
+    else:
+        rng = seeding.RowStream("ai_mock") if rng is None else rng
+        noise = rng.normal(0, 4, size=len(base))
+
+    return np.clip(base + prestige_bonus + brand_bonus + noise, 0, 100)
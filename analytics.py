@@ -1,43 +1,117 @@
+import copy
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from scipy import stats
-from scipy.spatial.distance import jensenshannon
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import roc_auc_score
 
+import config
+from accumulators import Histogram
+from instrumentation import timed
+import seeding
+
+# Probability bins for the streaming (histogram) AUC; ties within a bin count 1/2
+AUC_BINS = 1 << 16
+
+
+def _pair(p, q):
+    """A TrialAccumulator passed alone stands for its (AI, persona) score pair."""
+    if q is None:
+        return p.ai, p.persona
+    return p, q
+
+
+# Pseudo-count added to every bin of the binned KL/JS estimator (Jeffreys /
+# Krichevsky–Trofimov): keeps empty bins finite without flattening full ones
+BIN_SMOOTHING = 0.5
 
-def binomial_test(k, n, p0=0.5):
-    """Performs a binomial test for accuracy > chance level."""
+
+def _counts(x):
+    """Histogram counts of a Histogram or ScoreAccumulator; None for score arrays."""
+    if hasattr(x, "histogram"):
+        x = x.histogram
+    return x.counts if isinstance(x, Histogram) else None
+
+
+def _binned(p, q, smoothing):
+    """Smoothed bin probabilities of two accumulators, or None if p and q are score arrays."""
+    p, q = _pair(p, q)
+    p_counts, q_counts = _counts(p), _counts(q)
+    if p_counts is None and q_counts is None:
+        return None
+    if p_counts is None or q_counts is None or len(p_counts) != len(q_counts):
+        raise TypeError("Binned KL/JS needs two accumulators with the same number of bins")
+    p_counts = p_counts + smoothing
+    q_counts = q_counts + smoothing
+    return p_counts / p_counts.sum(), q_counts / q_counts.sum()
+
+
+@timed("analytics.binomial_test")
+def binomial_test(k, n=None, p0=0.5):
+    """Performs a binomial test for accuracy > chance level.
+    k may be an accumulator with correct/total counts, in which case n is omitted."""
+    from scipy import stats
+    if n is None:
+        k, n = k.correct, k.total
     result = stats.binomtest(k, n, p=p0)
     return result.pvalue
 
 
-def kl_divergence(p, q):
-    """Kullback-Leibler divergence D_KL(P || Q)."""
-    p = np.asarray(p, dtype=float)
-    q = np.asarray(q, dtype=float)
-    p = p / p.sum()
-    q = q / q.sum()
+@timed("analytics.kl_divergence", rows="arg")
+def kl_divergence(p, q=None, smoothing=BIN_SMOOTHING):
+    """Kullback-Leibler divergence D_KL(P || Q).
+
+    Score arrays: each array is one normalized vector, so trials are compared
+    position by position. Accumulators (histograms, score accumulators, or one
+    TrialAccumulator for AI vs persona): the binned estimator, KL between the
+    two bin distributions after adding `smoothing` to every bin. The two forms
+    measure different things and their values aren't comparable."""
+    binned = _binned(p, q, smoothing)
+    if binned is None:
+        p = np.asarray(p, dtype=float)
+        q = np.asarray(q, dtype=float)
+        p = p / p.sum()
+        q = q / q.sum()
+    else:
+        p, q = binned
+    from scipy import stats
     return stats.entropy(p, q)
 
 
-def js_divergence(p, q):
-    """Jensen–Shannon divergence (symmetric & bounded)."""
-    p = np.asarray(p, dtype=float)
-    q = np.asarray(q, dtype=float)
+@timed("analytics.js_divergence", rows="arg")
+def js_divergence(p, q=None, smoothing=BIN_SMOOTHING):
+    """Jensen–Shannon divergence (symmetric & bounded); positional for score
+    arrays, the smoothed binned estimator for accumulators, like kl_divergence."""
+    binned = _binned(p, q, smoothing)
+    if binned is None:
+        p = np.asarray(p, dtype=float)
+        q = np.asarray(q, dtype=float)
+    else:
+        p, q = binned
+    from scipy.spatial.distance import jensenshannon
     return jensenshannon(p, q) ** 2
 
 
-def earth_movers_distance(p, q):
-    """Earth Mover’s Distance (a.k.a Wasserstein distance)."""
+@timed("analytics.earth_movers_distance", rows="arg")
+def earth_movers_distance(p, q=None):
+    """Earth Mover’s Distance (a.k.a Wasserstein distance).
+    Accumulators are compared through their quantile sketches."""
+    from scipy import stats
+    p, q = _pair(p, q)
+    if hasattr(p, "sketch"):
+        p_values, p_weights = p.sketch.weighted_values()
+        q_values, q_weights = q.sketch.weighted_values()
+        return stats.wasserstein_distance(p_values, q_values, p_weights, q_weights)
     p = np.asarray(p, dtype=float)
     q = np.asarray(q, dtype=float)
     return stats.wasserstein_distance(p, q)
 
 
-def train_meta_classifier(X, y):
+@timed("analytics.train_meta_classifier", rows="arg")
+def train_meta_classifier(X, y, cv=None):
     """
     Train a simple meta-classifier to distinguish AI vs persona outputs.
-    Returns the fitted model and AUC score.
+    Returns the fitted model and AUC score. With cv=k the AUC is the mean
+    k-fold cross-validated AUC (folds run in parallel) instead of in-sample.
     """
     unique_classes = np.unique(y)
     if len(unique_classes) < 2:
@@ -45,9 +119,158 @@ def train_meta_classifier(X, y):
             f"Training data must contain at least two classes, but found only: {unique_classes}"
         )
     
+    from sklearn.linear_model import LogisticRegression
     model = LogisticRegression()
     model.fit(X, y)
     
-    probs = model.predict_proba(X)[:, 1]
-    auc = roc_auc_score(y, probs)
-    return model, auc
\ No newline at end of file
+    if cv:
+        from sklearn.model_selection import cross_val_score
+        auc = cross_val_score(LogisticRegression(), X, y, cv=cv, scoring="roc_auc", n_jobs=-1).mean()
+    else:
+        from sklearn.metrics import roc_auc_score
+        probs = model.predict_proba(X)[:, 1]
+        auc = roc_auc_score(y, probs)
+    return model, auc
+
+
+# -----------------------------
+# Out-of-core meta-classifier
+# -----------------------------
+class StreamingMetaClassifier:
+    """
+    Logistic regression trained chunk by chunk: SGD on log loss over features
+    standardized with running means/variances. Picklable, so a saved model can
+    warm-start the next re-audit.
+    """
+
+    classes = np.array([0, 1])
+
+    def __init__(self, alpha=1e-4, seed=None):
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.preprocessing import StandardScaler
+        self.scaler = StandardScaler()
+        self.model = SGDClassifier(loss="log_loss", alpha=alpha, random_state=seed)
+        self.n_seen = 0
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        self.scaler.partial_fit(X)
+        self.model.partial_fit(self.scaler.transform(X), y, classes=self.classes)
+        self.n_seen += len(X)
+        return self
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.scaler.transform(np.asarray(X, dtype=float)))
+
+    def save(self, path):
+        import joblib
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        import joblib
+        return joblib.load(path)
+
+
+def meta_features(trials):
+    """(X, y) from a trials frame: both scores as features, label 1 for persona trials."""
+    X = trials[["ai_score", "persona_score"]].to_numpy(dtype=float)
+    y = (trials["persona"] != "AI Model").to_numpy(dtype=int)
+    return X, y
+
+
+def _binned_auc(pos, neg):
+    """AUC from per-class probability histograms (Mann–Whitney on bins)."""
+    n_pos, n_neg = pos.sum(), neg.sum()
+    if not n_pos or not n_neg:
+        return float("nan")
+    neg_below = np.cumsum(neg) - neg
+    return float((pos @ neg_below + 0.5 * (pos @ neg)) / (n_pos * n_neg))
+
+
+def _chunk_source(chunks):
+    if callable(chunks):
+        return chunks
+    if iter(chunks) is chunks:
+        raise TypeError("chunks must be re-iterable (a list or a callable returning a fresh iterator)")
+    return lambda: iter(chunks)
+
+
+@timed("analytics.train_meta_classifier_stream")
+def train_meta_classifier_stream(chunks, n_folds=5, epochs=1, warm_start=None, workers=None,
+                                 seed=None, alpha=1e-4):
+    """
+    Out-of-core counterpart of train_meta_classifier for feature sets too large
+    for memory, e.g. load_trials(chunksize=...) mapped through meta_features.
+
+    chunks yields (X, y) pairs and is read epochs + 1 times: training passes,
+    then one pass scoring each row with the fold model that never saw it. Rows
+    are assigned to folds per chunk from a seeded RNG, so every pass agrees.
+    The n_folds fold models and the final all-rows model are updated in
+    parallel threads. warm_start is a StreamingMetaClassifier (or a path saved
+    by one) for the final model to continue from; it is copied, not modified.
+    Fold models always start fresh: a warm start has already seen rows that
+    land in their held-out folds, which would inflate the AUC.
+
+    Returns (model, cv) with cv = {"auc", "auc_std", "fold_auc", "n"}.
+    """
+    source = _chunk_source(chunks)
+    seed = config.RNG_SEED if seed is None else seed
+    if isinstance(warm_start, (str, os.PathLike)):
+        warm_start = StreamingMetaClassifier.load(warm_start)
+
+    final = copy.deepcopy(warm_start) if warm_start is not None else StreamingMetaClassifier(alpha, seed)
+    folds = [StreamingMetaClassifier(alpha, seed) for _ in range(n_folds)]
+    labels = np.zeros(2, dtype=np.int64)
+
+    def fold_ids(i, n):
+        rng = seeding.stream("meta_folds", i, seed=seed)
+        return rng.integers(0, n_folds, size=n) if n_folds else np.zeros(n, dtype=np.int64)
+
+    workers = min(n_folds + 1, os.cpu_count() or 1) if workers is None else workers
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for epoch in range(epochs):
+            for i, (X, y) in enumerate(source()):
+                X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=int)
+                fold = fold_ids(i, len(y))
+                # SGD is order-sensitive; shuffle rows within the chunk each epoch
+                order = seeding.stream("meta_shuffle", epoch, i, seed=seed).permutation(len(y))
+                X, y, fold = X[order], y[order], fold[order]
+                if epoch == 0:
+                    labels += np.bincount(y, minlength=2)[:2]
+                jobs = [pool.submit(final.partial_fit, X, y)]
+                for f, m in enumerate(folds):
+                    train = fold != f
+                    if train.any():
+                        jobs.append(pool.submit(m.partial_fit, X[train], y[train]))
+                for job in jobs:
+                    job.result()
+
+        if not labels.all():
+            raise ValueError(
+                f"Training data must contain at least two classes, but found only: {np.flatnonzero(labels)}"
+            )
+
+        hists = [(Histogram(AUC_BINS, 0, 1), Histogram(AUC_BINS, 0, 1)) for _ in folds]
+
+        def score(f, X, y, fold):
+            held = fold == f
+            if held.any():
+                probs = folds[f].predict_proba(X[held])[:, 1]
+                hists[f][0].update_many(probs[y[held] == 1])
+                hists[f][1].update_many(probs[y[held] == 0])
+
+        for i, (X, y) in enumerate(source() if folds else ()):
+            X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=int)
+            fold = fold_ids(i, len(y))
+            for job in [pool.submit(score, f, X, y, fold) for f in range(n_folds)]:
+                job.result()
+
+    fold_auc = [_binned_auc(pos.counts, neg.counts) for pos, neg in hists]
+    cv = {
+        "auc": float(np.nanmean(fold_auc)) if fold_auc else float("nan"),
+        "auc_std": float(np.nanstd(fold_auc)) if fold_auc else float("nan"),
+        "fold_auc": fold_auc,
+        "n": int(labels.sum()),
+    }
+    return final, cv
\ No newline at end of file
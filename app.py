@@ -1,13 +1,6 @@
 import streamlit as st
 import pandas as pd
-import random
-import json
 import numpy as np
-import io
-from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
-import shap
 
 # Ensure necessary backend modules are available
 # You would need to have these files in your project directory
@@ -18,13 +11,15 @@ from analytics import (
     earth_movers_distance,
     train_meta_classifier,
 )
-from personas import bias_personas
-from counterfactuals import generate_counterfactuals
-from ai_mock import ai_mock_score
-from db import save_run_result
+from accumulators import TrialAccumulator
+from db import get_engine, get_writer, save_run_result_async
+from pool import CandidatePool
 import data_generator
 import report
 import mitigation
+import fairness
+import instrumentation
+import config
 
 # -----------------------------
 # Load resumes (cached)
@@ -40,6 +35,25 @@ def load_resumes():
 
 resumes_df = load_resumes()
 
+# Process-wide resources, shared across reruns and sessions
+@st.cache_resource
+def candidate_pool():
+    """Pre-scored trials; refills itself in the background. A remote scorer
+    (SCORER_URL) sits behind the score cache so repeat resumes skip the API."""
+    resumes = resumes_df.to_dict(orient="records") if isinstance(resumes_df, pd.DataFrame) else resumes_df
+    backend = None
+    if config.SCORER_URL:
+        from cache import CachedBackend
+        from scoring import get_backend
+        backend = CachedBackend(get_backend())
+    return CandidatePool(resumes, backend=backend)
+
+@st.cache_resource
+def db_engine():
+    return get_engine()
+
+db_engine()
+
 # -----------------------------
 # Streamlit App
 # -----------------------------
@@ -55,32 +69,26 @@ This tool lets you test if you can spot a hiring bot with a hidden bias. Your re
 # -----------------------------
 if "trials" not in st.session_state:
     st.session_state.trials = []
+    # Running binned summary of the same trials (accuracy counts, score histograms)
+    st.session_state.summary = TrialAccumulator()
 
 # -----------------------------
 # Game: Reverse Turing Test
 # -----------------------------
 st.header("🎮 Spot the Biased Scorer")
 
-if st.button("Get a New Candidate"):
-    resume_idx = random.choice(resumes_df.index.tolist())
-    st.session_state.current_resume_idx = resume_idx
+if st.button("Get a New Candidate") or "candidate" not in st.session_state:
+    st.session_state.candidate = candidate_pool().next()
 
-if 'current_resume_idx' not in st.session_state:
-    st.session_state.current_resume_idx = random.choice(resumes_df.index.tolist())
-    
-resume = resumes_df.loc[st.session_state.current_resume_idx].to_dict()
+# Scores and their order were fixed when the candidate was drawn, so the render
+# and the submit see the same values
+candidate = st.session_state.candidate
+resume = candidate.resume
 
 st.subheader("Candidate Profile")
 st.json(resume)
 
-# AI + persona scoring
-ai_score = ai_mock_score(resume)
-persona_name, persona_fn = random.choice(list(bias_personas.items()))
-persona_score = persona_fn(resume)
-
-# Shuffle order
-scores = [("AI Model", ai_score), (persona_name, persona_score)]
-random.shuffle(scores)
+scores = candidate.options
 
 st.write("### How the Candidate Was Rated")
 for idx, (src, val) in enumerate(scores):
@@ -98,16 +106,10 @@ if st.button("Submit Guess"):
     if choice is None:
         st.warning("Please make a selection before submitting.")
     else:
-        correct_answer = 1 if scores[choice-1][0] == persona_name else 0
-        st.session_state.trials.append({
-            "resume": resume,
-            "ai_score": ai_score,
-            "persona_score": persona_score,
-            "persona": persona_name,
-            "choice": choice,
-            "correct": correct_answer,
-            "explanation": explanation
-        })
+        trial = candidate.trial(choice, explanation)
+        st.session_state.trials.append(trial)
+        st.session_state.summary.update(trial)
+        st.session_state.candidate = candidate_pool().next()
         st.success("✅ Guess submitted! Try to spot another one.")
         st.rerun()
 
@@ -133,7 +135,7 @@ if st.sidebar.button("Run the Report"):
             st.subheader("Your Performance")
             st.write(f"You correctly identified the biased judge **{correct}/{n}** times (**{correct/n:.2%}**).")
 
-            pval = binomial_test(correct, n, p0=0.5)
+            pval = binomial_test(st.session_state.summary, p0=0.5)
             st.write(f"The statistical significance (p-value) of your performance is **{pval:.4f}**.")
             st.write("*(A low p-value, below 0.05, suggests you're likely not guessing randomly and are good at spotting bias.)*")
             
@@ -150,6 +152,9 @@ if st.sidebar.button("Run the Report"):
             st.write(f"KL Divergence: **{kl:.4f}**")
             st.write(f"JS Divergence: **{js:.4f}**")
             st.write(f"Earth Mover's Distance: **{emd:.4f}**")
+            st.write(f"Binned KL / JS Divergence (score histograms): "
+                     f"**{kl_divergence(st.session_state.summary):.4f}** / "
+                     f"**{js_divergence(st.session_state.summary):.4f}**")
             st.write("*(A higher number means the scoring patterns are more different.)*")
             
             X = df[["ai_score", "persona_score"]].values
@@ -158,7 +163,9 @@ if st.sidebar.button("Run the Report"):
             st.subheader("Can an AI Spot the Bias?")
             if len(np.unique(y)) > 1:
                 try:
-                    _, auc = train_meta_classifier(X, y)
+                    # Cross-validate when every class has enough rows for the folds
+                    folds = min(5, int(np.bincount(y).min()))
+                    _, auc = train_meta_classifier(X, y, cv=folds if folds >= 2 else None)
                     st.write(f"A separate AI model can spot the bias with an AUC of **{auc:.3f}**.")
                     st.write("*(An AUC over 0.5 means the AI can find the bias, and an AUC close to 1.0 means it's very easy to spot.)*")
                 except ValueError as e:
@@ -170,6 +177,9 @@ if st.sidebar.button("Run the Report"):
             st.subheader("Visualizing Score Distributions")
             st.write("The chart below shows how the AI and the biased persona scored the candidates.")
             
+            # Plotting libraries are only needed here; keep them off the startup path
+            import matplotlib.pyplot as plt
+            import seaborn as sns
             fig, ax = plt.subplots(figsize=(10, 6))
             sns.kdeplot(ai_scores, label="AI Model Score", ax=ax)
             sns.kdeplot(persona_scores, label=f"Biased Persona Score", ax=ax)
@@ -182,12 +192,22 @@ if st.sidebar.button("Run the Report"):
         with tab4:
             st.subheader("Bias Correction")
             st.write("Our system can automatically adjust scores to make them fairer.")
-            mitigated_scores = mitigation.apply_reweighing(ai_scores, persona_scores)
-            st.write("The AI's scores have been adjusted for fairness.")
+            groups = fairness.protected_attributes(df["resume"].tolist())[["gender", "school_tier"]]
+            mitigator = mitigation.ThresholdMitigator("demographic_parity").fit(ai_scores, groups)
+            mitigated_scores = mitigator.adjust(ai_scores, groups)
+            # One cutoff rule (fairness.select: strictly above) on both sides: before at the
+            # mitigator's base threshold (the median, as in the report's impact-ratio table),
+            # after at its per-group thresholds
+            before = fairness.group_rates(fairness.select(ai_scores, mitigator.base_threshold_), groups)
+            after = fairness.group_rates(mitigator.predict(ai_scores, groups), groups)
+            st.write("The AI's scores have been adjusted so every group is selected at the same rate.")
+            st.write(f"Lowest impact ratio: **{before['impact_ratio'].min():.3f}** before, "
+                     f"**{after['impact_ratio'].min():.3f}** after.")
             st.write(f"The new average score is: **{mitigated_scores.mean():.3f}**")
             
             st.subheader("Compliance Report")
-            report_html = report.generate_report(df, ai_scores, persona_scores)
+            report_html = report.generate_report(df, ai_scores, persona_scores, fairness=before,
+                                                 summary=st.session_state.summary)
             st.download_button(
                 "⬇️ Download Compliance Report (HTML)",
                 data=report_html,
@@ -195,7 +215,23 @@ if st.sidebar.button("Run the Report"):
                 mime="text/html"
             )
             
-            save_run_result("reverse_turing_test", {"n": n}, df.to_dict(orient="records"))
-            st.success("✅ All results saved.")
+            save_run_result_async("reverse_turing_test", {"n": n}, df.to_dict(orient="records"))
+            st.success("✅ Results queued for saving.")
 
 st.sidebar.info("👉 Submit several guesses, then click **Run the Report** to see how the scores compare.")
+
+backlog = get_writer().backlog()
+if backlog["runs"]:
+    st.sidebar.caption(f"💾 Saving {backlog['runs']} run(s) ({backlog['trials']} trials) in the background…")
+if backlog["failed"]:
+    st.sidebar.warning(f"{backlog['failed']} run(s) could not be saved ({backlog['last_error']}); "
+                       f"they were written to {get_writer().dead_letter_path} for replay.")
+
+# Per-session display toggle; recording is process-wide, so ticking only ever enables it
+if st.sidebar.checkbox("⏱ Show stage timings", value=instrumentation.is_enabled(), key="show_timings"):
+    instrumentation.enable()
+    timings = instrumentation.span_table()
+    if timings:
+        st.sidebar.dataframe(pd.DataFrame(timings), hide_index=True)
+    else:
+        st.sidebar.caption("No stages timed yet; play a round or run the report.")
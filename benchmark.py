@@ -0,0 +1,350 @@
+# benchmark.py
+"""
+Benchmark suite for every pipeline stage.
+
+Each stage runs at 1e3–1e6 rows, capped per stage for the scalar and DB paths.
+For each stage and size it records:
+- latency percentiles over the repeats;
+- throughput in rows/s at the median;
+- peak traced memory, from one extra tracemalloc run.
+
+Every point gets an untimed warm-up call (lazy imports, caches) and is
+repeated until it has run at least MIN_TIME seconds. Runs are appended to a
+JSON history file (config.BENCH_HISTORY_PATH or --history). `--compare` checks the run against a baseline and flags
+regressions larger than both the relative tolerance and an absolute noise
+floor.
+
+    python benchmark.py                                  # all stages, 1e3..1e6
+    python benchmark.py --stages ai_mock_batch generate_report --max-rows 100000
+    python benchmark.py --compare --fail-on-regression   # vs the previous run
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+import config
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+HISTORY_PATH = config.BENCH_HISTORY_PATH
+# Relative slowdown / memory growth over the baseline that counts as a regression
+TOLERANCE = 0.25
+# Absolute changes below these never count, however large relatively
+NOISE_FLOOR_S = 0.002
+NOISE_FLOOR_MB = 1.0
+# Keep repeating a point until this much time was measured (up to MAX_REPEATS)
+MIN_TIME = 0.5
+MAX_REPEATS = 1000
+
+
+@dataclass
+class Stage:
+    name: str
+    setup: Callable            # n → context passed to run (not timed)
+    run: Callable              # context → None
+    max_rows: Optional[int] = None
+
+
+# -----------------------------
+# Stage setups
+# -----------------------------
+def _table(n):
+    import data_generator
+    from models import ResumeTable
+    return ResumeTable.concat(data_generator.generate_chunks(n)).take(np.arange(n))
+
+
+def _dicts(n):
+    return _table(n).to_dicts()
+
+
+def _scores(n):
+    rng = np.random.default_rng(0)
+    return rng.normal(65, 8, n).clip(0, 100), rng.choice([0.4, 0.5, 0.8, 0.9], n)
+
+
+def _trials_frame(n):
+    import pandas as pd
+    ai, persona = _scores(n)
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({"correct": rng.integers(0, 2, n), "ai_score": ai, "persona_score": persona,
+                         "persona": rng.choice(["AI Model", "Ivy-only Bias"], n)})
+
+
+def _groups(n):
+    rng = np.random.default_rng(2)
+    return rng.choice(["female", "male", "unknown"], n), rng.choice(["ivy", "prestige", "other"], n)
+
+
+_bench_db = None     # (temp dir, SQLite URL to restore) of the current _fresh_db
+
+
+def _fresh_db():
+    """Point db at an empty SQLite file so save paths don't touch rt_test.db."""
+    global _bench_db
+    import config
+    import db
+    url = _drop_db()
+    tmp = tempfile.mkdtemp(prefix="rt_bench_")
+    _bench_db = (tmp, url or config.SQLITE_URL)
+    config.SQLITE_URL = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    db._engine = db._Session = None
+    return db
+
+
+def _drop_db():
+    """Dispose the benchmark engine, delete its temp dir and restore the db URL."""
+    global _bench_db
+    if _bench_db is None:
+        return None
+    import config
+    import db
+    tmp, url = _bench_db
+    if db._engine is not None:
+        db._engine.dispose()
+    db._engine = db._Session = None
+    config.SQLITE_URL = url
+    shutil.rmtree(tmp, ignore_errors=True)
+    _bench_db = None
+    return url
+
+
+def _run_trials(n):
+    ai, persona = _scores(n)
+    resumes = _dicts(min(n, 10_000))
+    trials = [{"resume": resumes[i % len(resumes)], "persona": "Ivy-only Bias", "ai_score": ai[i],
+               "persona_score": persona[i], "choice": 1, "correct": i % 2} for i in range(n)]
+    return _fresh_db(), trials
+
+
+def _stages():
+    import ai_mock
+    import analytics
+    import counterfactuals
+    import data_generator
+    import fairness
+    import mitigation
+    import personas
+    import report
+    import seeding
+
+    def scalar_personas(rows):
+        for fn in personas.bias_personas.values():
+            for r in rows:
+                fn(r)
+
+    def scalar_ai(rows):
+        rng = seeding.stream("benchmark")
+        for r in rows:
+            ai_mock.ai_mock_score(r, rng)
+
+    def meta_xy(n):
+        ai, persona = _scores(n)
+        X = np.c_[ai, persona]
+        return X, (np.arange(n) % 2)
+
+    return [
+        Stage("generate_chunks", lambda n: n, lambda n: list(data_generator.generate_chunks(n))),
+        Stage("generate_synthetic", lambda n: n, data_generator.generate_synthetic, max_rows=100_000),
+        Stage("ai_mock_score", _dicts, scalar_ai, max_rows=100_000),
+        Stage("ai_mock_batch", _table, lambda t: ai_mock.ai_mock_score_batch(t, seeding.stream("benchmark"))),
+        Stage("personas_scalar", _dicts, scalar_personas, max_rows=100_000),
+        Stage("personas_batch", _table, personas.score_personas_batch),
+        Stage("counterfactual_audit", _table, lambda t: counterfactuals.counterfactual_audit(t), max_rows=100_000),
+        Stage("kl_js_emd", _scores, lambda s: (analytics.kl_divergence(*s), analytics.js_divergence(*s),
+                                             analytics.earth_movers_distance(*s))),
+        Stage("meta_classifier", meta_xy, lambda xy: analytics.train_meta_classifier(*xy)),
+        Stage("group_rates", lambda n: (_scores(n)[0] > 65, _groups(n)),
+              lambda c: fairness.group_rates(c[0], {"gender": c[1][0], "tier": c[1][1]})),
+        Stage("threshold_mitigator", lambda n: (_scores(n)[0], _groups(n)[0]),
+              lambda c: mitigation.ThresholdMitigator().fit(*c).predict(*c)),
+        Stage("calibrator", lambda n: (_scores(n)[0], np.arange(n) % 2),
+              lambda c: mitigation.Calibrator.fit(*c)(c[0])),
+        Stage("generate_report", lambda n: (_trials_frame(n),) + _scores(n),
+              lambda c: report.generate_report(*c)),
+        Stage("db_bulk_save_runs", _run_trials, lambda c: c[0].bulk_save_runs([("bench", {}, c[1])]),
+              max_rows=100_000),
+        Stage("db_bulk_save_resumes", lambda n: (_fresh_db(), _table(n)),
+              lambda c: c[0].bulk_save_resumes(c[1]), max_rows=100_000),
+    ]
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def _repeats(n):
+    return 7 if n <= 10_000 else 5 if n <= 100_000 else 3
+
+
+def measure(stage, n, repeats=None, min_time=MIN_TIME):
+    """
+    Latency percentiles, throughput and peak memory of one stage at n rows.
+    Runs at least `repeats` times and until `min_time` seconds were measured.
+    """
+    repeats = repeats or _repeats(n)
+    stage.run(stage.setup(n))           # warm-up, not timed
+    times = []
+    while len(times) < repeats or (sum(times) < min_time and len(times) < MAX_REPEATS):
+        ctx = stage.setup(n)
+        t0 = time.perf_counter()
+        stage.run(ctx)
+        times.append(time.perf_counter() - t0)
+
+    ctx = stage.setup(n)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    stage.run(ctx)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    times = np.array(times)
+    p50, p90, p99 = np.percentile(times, [50, 90, 99])
+    return {
+        "stage": stage.name,
+        "rows": n,
+        "repeats": len(times),
+        "p50_s": float(p50),
+        "p90_s": float(p90),
+        "p99_s": float(p99),
+        "rows_per_s": float(n / p50) if p50 > 0 else float("inf"),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def run(stages=None, sizes=SIZES, max_rows=None, log=print):
+    """Measure the selected stages at every size they allow."""
+    all_stages = _stages()
+    unknown = set(stages or ()) - {s.name for s in all_stages}
+    if unknown:
+        raise ValueError(f"Unknown benchmark stages: {sorted(unknown)}")
+    selected = [s for s in all_stages if not stages or s.name in stages]
+    results = []
+    try:
+        for stage in selected:
+            limit = min(x for x in (stage.max_rows, max_rows) if x) if (stage.max_rows or max_rows) else None
+            for n in sizes:
+                if limit and n > limit:
+                    continue
+                r = measure(stage, n)
+                results.append(r)
+                if log:
+                    log(f"{r['stage']:<22} {n:>9,} rows  p50 {r['p50_s'] * 1e3:9.1f} ms  "
+                        f"{r['rows_per_s']:>12,.0f} rows/s  peak {r['peak_mb']:8.1f} MB")
+    finally:
+        _drop_db()
+    return results
+
+
+# -----------------------------
+# History and regression check
+# -----------------------------
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def record(results, path=HISTORY_PATH, label=None):
+    """Append a run (results plus machine/commit info) to the history file; returns the entry."""
+    entry = {
+        "timestamp": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "label": label,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    history = load_history(path)
+    history.append(entry)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(history, fh, indent=1)
+    return entry
+
+
+def compare(results, baseline, tolerance=TOLERANCE, noise_floor_s=NOISE_FLOOR_S,
+            noise_floor_mb=NOISE_FLOOR_MB):
+    """
+    Regressions of `results` against a baseline run's results: entries whose
+    median latency or peak memory grew by more than `tolerance` and by more
+    than the metric's absolute noise floor.
+    """
+    base = {(r["stage"], r["rows"]): r for r in baseline}
+    floors = {"p50_s": noise_floor_s, "peak_mb": noise_floor_mb}
+    regressions = []
+    for r in results:
+        b = base.get((r["stage"], r["rows"]))
+        if b is None:
+            continue
+        for metric, floor in floors.items():
+            if b[metric] > 0 and r[metric] - b[metric] > max(b[metric] * tolerance, floor):
+                regressions.append({"stage": r["stage"], "rows": r["rows"], "metric": metric,
+                                    "baseline": b[metric], "current": r[metric],
+                                    "change": r[metric] / b[metric] - 1})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage.")
+    parser.add_argument("--stages", nargs="*", help="stage names (default: all)")
+    parser.add_argument("--sizes", nargs="*", type=int, default=list(SIZES))
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--label", default=None, help="name this run in the history")
+    parser.add_argument("--compare", action="store_true", help="compare with a baseline run")
+    parser.add_argument("--baseline", default=None, help="baseline label (default: previous run)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--noise-floor-ms", type=float, default=NOISE_FLOOR_S * 1e3,
+                        help="ignore latency changes smaller than this")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--list", action="store_true", help="list stage names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for s in _stages():
+            print(s.name if not s.max_rows else f"{s.name} (≤ {s.max_rows:,} rows)")
+        return 0
+
+    history = load_history(args.history)
+    results = run(args.stages, args.sizes, args.max_rows)
+    record(results, args.history, args.label)
+
+    if not args.compare:
+        return 0
+    candidates = [h for h in history if args.baseline is None or h.get("label") == args.baseline]
+    if not candidates:
+        print("No baseline run to compare against", file=sys.stderr)
+        return 0
+    regressions = compare(results, candidates[-1]["results"], args.tolerance, args.noise_floor_ms / 1e3)
+    for g in regressions:
+        print(f"REGRESSION {g['stage']} @ {g['rows']:,}: {g['metric']} "
+              f"{g['baseline']:.4g} → {g['current']:.4g} (+{g['change']:.0%})")
+    if not regressions:
+        print("No regressions against baseline.")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
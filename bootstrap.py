@@ -0,0 +1,194 @@
+# bootstrap.py
+"""
+Bootstrap confidence intervals and permutation p-values for the distribution
+metrics in analytics.py.
+
+Resamples are drawn as (block, n) index matrices and the built-in metrics are
+evaluated row-wise with NumPy (KL/JS bootstrap rows as multiplicity counts);
+blocks fan out over a process pool. Each block
+has its own seed spawned from one SeedSequence, so results don't depend on the
+number of workers.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+import seeding
+
+# Rows of the (block, n) resample matrix held in memory at once per worker
+_BLOCK_ELEMENTS = 4_000_000
+
+
+def _entropy_rows(p, q, w=None):
+    """Row-wise scipy.stats.entropy(p, q) for already-normalized rows, optionally weighted."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(p > 0, p * np.log(p / q), 0.0)
+    return (terms if w is None else w * terms).sum(axis=1)
+
+
+def _normalize_rows(x):
+    return x / x.sum(axis=1, keepdims=True)
+
+
+# Value form: one (p, q) pair of score arrays per row.
+def kl_rows(p, q):
+    return _entropy_rows(_normalize_rows(p), _normalize_rows(q))
+
+
+def js_rows(p, q):
+    # Same as analytics.js_divergence: squared scipy jensenshannon distance
+    p, q = _normalize_rows(p), _normalize_rows(q)
+    m = (p + q) / 2
+    return (_entropy_rows(p, m) + _entropy_rows(q, m)) / 2
+
+
+def emd_rows(p, q):
+    # For equal-size unweighted samples W1 is the mean gap between sorted values
+    return np.abs(np.sort(p, axis=1) - np.sort(q, axis=1)).mean(axis=1)
+
+
+# Count form: a bootstrap resample is a row of multiplicities w over the original
+# trials, which lets KL reduce to matrix-vector products.
+def kl_counts(a, q, w):
+    sa, sq = w @ a, w @ q
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a_log_a = np.where(a > 0, a * np.log(a), 0.0)
+        a_log_q = np.where(a > 0, a * np.log(q), 0.0)
+        return (w @ a_log_a - w @ a_log_q) / sa - np.log(sa) + np.log(sq)
+
+
+def js_counts(a, q, w):
+    p = a / (w @ a)[:, None]
+    r = q / (w @ q)[:, None]
+    m = (p + r) / 2
+    return (_entropy_rows(p, m, w) + _entropy_rows(r, m, w)) / 2
+
+
+# name → (value form, count form) of analytics.kl_divergence, js_divergence and
+# earth_movers_distance
+METRICS = {
+    "kl": (kl_rows, kl_counts),
+    "js": (js_rows, js_counts),
+    "emd": (emd_rows, None),           # the row sort is already the cheapest form
+}
+
+
+def _rowwise(fn, p, q):
+    return np.array([fn(a, b) for a, b in zip(p, q)], dtype=float)
+
+
+def _resolve(metrics):
+    """Names map to the vectorized built-ins; other callables (p, q) → float,
+    e.g. the analytics functions themselves, are evaluated one row at a time."""
+    out = {}
+    for m in metrics:
+        if isinstance(m, str):
+            out[m] = METRICS[m]
+        else:
+            out[getattr(m, "__name__", repr(m))] = (partial(_rowwise, m), None)
+    return out
+
+
+def _bootstrap_block(ai, persona, metrics, size, seed):
+    rng = np.random.default_rng(seed)
+    n = len(ai)
+    idx = rng.integers(0, n, size=(size, n))
+    offsets = (np.arange(size) * n)[:, None]
+    w = np.bincount((idx + offsets).ravel(), minlength=size * n).reshape(size, n)
+    out = {}
+    for name, (values_fn, counts_fn) in metrics.items():
+        out[name] = counts_fn(ai, persona, w) if counts_fn else values_fn(ai[idx], persona[idx])
+    return out
+
+
+def _permutation_block(ai, persona, metrics, size, seed):
+    # Under H0 the two scorers are exchangeable, so swap each pair with prob 1/2
+    rng = np.random.default_rng(seed)
+    swap = rng.random((size, len(ai))) < 0.5
+    p = np.where(swap, persona, ai)
+    q = np.where(swap, ai, persona)
+    return {name: values_fn(p, q) for name, (values_fn, _) in metrics.items()}
+
+
+def _run_blocks(task, key, ai, persona, metrics, n_draws, seed, workers):
+    block = max(1, min(n_draws, _BLOCK_ELEMENTS // max(1, len(ai))))
+    sizes = [min(block, n_draws - start) for start in range(0, n_draws, block)]
+    seeds = seeding.spawn(len(sizes), key, seed=seed)
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1 or len(sizes) == 1:
+        parts = [task(ai, persona, metrics, s, sd) for s, sd in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            parts = list(pool.map(task, [ai] * len(sizes), [persona] * len(sizes),
+                                  [metrics] * len(sizes), sizes, seeds))
+    return {name: np.concatenate([part[name] for part in parts]) for name in metrics}
+
+
+def _inputs(ai_scores, persona_scores):
+    ai = np.asarray(ai_scores, dtype=float)
+    persona = np.asarray(persona_scores, dtype=float)
+    if ai.shape != persona.shape or ai.ndim != 1:
+        raise ValueError("ai_scores and persona_scores must be 1-D arrays of paired trials")
+    return ai, persona
+
+
+def bootstrap_ci(ai_scores, persona_scores, metrics=("kl", "js", "emd"), n_resamples=1000,
+                 alpha=0.05, seed=None, workers=None):
+    """
+    Percentile bootstrap over paired trials. Returns a DataFrame indexed by metric
+    with the point estimate, bootstrap standard error and the (1 − alpha) interval.
+    """
+    ai, persona = _inputs(ai_scores, persona_scores)
+    metrics = _resolve(metrics)
+    draws = _run_blocks(_bootstrap_block, "bootstrap", ai, persona, metrics, n_resamples,
+                        seed, workers)
+    rows = {}
+    for name, (fn, _) in metrics.items():
+        estimate = float(fn(ai[None, :], persona[None, :])[0])
+        d = draws[name][np.isfinite(draws[name])]
+        low, high = np.quantile(d, [alpha / 2, 1 - alpha / 2]) if len(d) else (np.nan, np.nan)
+        rows[name] = {"estimate": estimate, "se": float(d.std(ddof=1)) if len(d) > 1 else np.nan,
+                      "ci_low": float(low), "ci_high": float(high)}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+# KL/JS are positional over raw scores on different scales (AI 0–100, persona
+# 0–1), so swapping pairs inflates them and their permutation p-value says
+# nothing about whether the distributions differ
+_NOT_PERMUTABLE = ("kl", "js")
+
+
+def permutation_test(ai_scores, persona_scores, metrics=("emd",), n_permutations=1000,
+                     seed=None, workers=None):
+    """
+    Permutation p-values for "the AI and persona score distributions differ":
+    the share of pair-swapped resamples whose metric is at least the observed one.
+    Built-in metrics: EMD only.
+    """
+    bad = [m for m in metrics if isinstance(m, str) and m in _NOT_PERMUTABLE]
+    if bad:
+        raise ValueError(f"permutation_test doesn't support positional metrics {bad}; use 'emd'")
+    ai, persona = _inputs(ai_scores, persona_scores)
+    metrics = _resolve(metrics)
+    draws = _run_blocks(_permutation_block, "permutation", ai, persona, metrics, n_permutations,
+                        seed, workers)
+    rows = {}
+    for name, (fn, _) in metrics.items():
+        observed = float(fn(ai[None, :], persona[None, :])[0])
+        p_value = (1 + np.count_nonzero(draws[name] >= observed)) / (1 + n_permutations)
+        rows[name] = {"statistic": observed, "p_value": float(p_value)}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def metric_uncertainty(ai_scores, persona_scores, metrics=("kl", "js", "emd"), n_resamples=1000,
+                       alpha=0.05, seed=None, workers=None):
+    """bootstrap_ci and permutation_test side by side; p_value is NaN for KL/JS."""
+    ci = bootstrap_ci(ai_scores, persona_scores, metrics, n_resamples, alpha, seed, workers)
+    permutable = [m for m in metrics if not (isinstance(m, str) and m in _NOT_PERMUTABLE)]
+    if not permutable:
+        return ci.assign(p_value=np.nan)
+    perm = permutation_test(ai_scores, persona_scores, permutable, n_resamples, seed, workers)
+    return ci.join(perm[["p_value"]])
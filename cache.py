@@ -0,0 +1,175 @@
+# cache.py
+"""
+Content-addressed score cache.
+
+Keys are a SHA-256 of the normalized resume (minus its uid, which differs for
+otherwise identical resumes) plus the scorer's name and version. Lookups go
+through a bounded in-memory LRU first and a SQLite file second.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import config
+from instrumentation import count
+from models import normalize_resume
+from scoring import ScoringBackend
+
+
+def resume_digest(resume):
+    """
+    Content hash of a resume, including its uid when it has one: scorers may
+    key noise on the uid (ai_mock's default does), so equal content under two
+    uids can score differently.
+    """
+    r = normalize_resume(resume)
+    if "uid" not in resume:
+        r.pop("uid", None)          # normalize_resume made up a random one
+    blob = json.dumps(r, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def scorer_id(fn, version=None):
+    """Stable identity for a scoring callable; compiled personas include their rule."""
+    name = f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+    rule = getattr(fn, "rule", None)
+    if rule is not None:
+        name += ":" + hashlib.sha256(repr(rule).encode()).hexdigest()[:12]
+    return f"{name}@{version or getattr(fn, 'version', '1')}"
+
+
+def cache_key(resume, scorer):
+    return f"{scorer}:{resume_digest(resume)}"
+
+
+class ScoreCache:
+    """Two-tier score cache: LRU dict in memory, optional SQLite table on disk."""
+
+    def __init__(self, max_items=None, path=None, persist=True):
+        self.max_items = max_items or config.SCORE_CACHE_SIZE
+        self.path = path or config.SCORE_CACHE_PATH
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+        self._db = None
+        if persist:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL)")
+
+    def _remember(self, key, value):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        if len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                count("score_cache_lookups", result="hit")
+                return self._mem[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT score FROM scores WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    count("score_cache_lookups", result="disk_hit")
+                    self._remember(key, row[0])
+                    return row[0]
+            self.misses += 1
+            count("score_cache_lookups", result="miss")
+            return None
+
+    def put_many(self, items):
+        items = [(k, float(v)) for k, v in items]
+        with self._lock:
+            for k, v in items:
+                self._remember(k, v)
+            if self._db is not None:
+                with self._db:
+                    self._db.executemany("INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)", items)
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_items": len(self._mem),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM scores")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+_default = None
+
+
+def default_cache():
+    global _default
+    if _default is None:
+        _default = ScoreCache()
+    return _default
+
+
+def cached(fn, version=None, cache=None):
+    """Wrap a resume → score callable so repeat resumes are served from the cache."""
+    sid = scorer_id(fn, version)
+
+    def wrapper(resume):
+        c = cache or default_cache()
+        key = cache_key(resume, sid)
+        score = c.get(key)
+        if score is None:
+            score = fn(resume)
+            c.put(key, score)
+        return score
+
+    wrapper.__doc__ = fn.__doc__
+    wrapper.__wrapped__ = fn
+    return wrapper
+
+
+class CachedBackend(ScoringBackend):
+    """Scoring backend wrapper that only sends cache misses to the inner backend."""
+
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache
+        self.name = f"cached:{backend.name}"
+        self.version = backend.version
+        self._sid = backend.identity()
+
+    async def ascore_many(self, resumes):
+        c = self.cache or default_cache()
+        resumes = list(resumes)
+        keys = [cache_key(r, self._sid) for r in resumes]
+        scores = [c.get(k) for k in keys]
+        todo = [i for i, s in enumerate(scores) if s is None]
+        if todo:
+            fresh = await self.backend.ascore_many([resumes[i] for i in todo])
+            c.put_many((keys[i], s) for i, s in zip(todo, fresh))
+            for i, s in zip(todo, fresh):
+                scores[i] = s
+        return scores
+
+    async def ascore_batch(self, resumes):
+        return await self.ascore_many(resumes)
@@ -1,16 +1,28 @@
 # counterfactuals.py
 import copy
-import random
+import inspect
+import itertools
 
-def generate_counterfactuals(resumes, n_pairs=5):
+import numpy as np
+import pandas as pd
+
+import seeding
+from matcher import IVY
+from models import ResumeTable
+from instrumentation import timed
+
+def generate_counterfactuals(resumes, n_pairs=5, rng=None):
     """
     Generate counterfactual resume pairs by minimally editing sensitive attributes.
     Each pair = (original, counterfactual).
+    rng: Generator choosing the resumes; a fixed seeding stream when None.
     """
     pairs = []
     sensitive_attributes = ["gender", "education_school", "gap_years"]
+    rng = seeding.stream("counterfactuals") if rng is None else rng
 
-    for resume in random.sample(resumes, min(n_pairs, len(resumes))):
+    for i in rng.choice(len(resumes), size=min(n_pairs, len(resumes)), replace=False):
+        resume = resumes[i]
         # Copy resume for counterfactual
         cf = copy.deepcopy(resume)
 
@@ -20,8 +32,7 @@ def generate_counterfactuals(resumes, n_pairs=5):
 
         # Modify school prestige (swap Ivy <-> Non-Ivy)
         if "education_school" in cf:
-            school = cf["education_school"].lower()
-            if any(ivy in school for ivy in ["harvard", "yale", "princeton", "columbia", "brown", "dartmouth", "upenn", "cornell"]):
+            if IVY(cf["education_school"]):
                 cf["education_school"] = "Generic State University"
             else:
                 cf["education_school"] = "Harvard University"
@@ -33,3 +44,152 @@ def generate_counterfactuals(resumes, n_pairs=5):
         pairs.append((resume, cf))
 
     return pairs
+
+
+# -----------------------------
+# Exhaustive counterfactual engine
+# -----------------------------
+IVY_SWAP_OUT = "Generic State University"
+IVY_SWAP_IN = "Harvard University"
+
+
+def _lookup_flip(table, field, fn):
+    """Apply fn to each distinct vocab value of a coded field and remap the codes."""
+    vocab = table.vocab[field]
+    lut = np.array([vocab.intern(fn(v)) for v in list(vocab.values)] + [-1], dtype=table.codes[field].dtype)
+    return lut[table.codes[field]]
+
+
+def _flip_gender(table):
+    return {"gender": _lookup_flip(table, "gender",
+                                   lambda g: "female" if str(g).lower() == "male" else "male")}
+
+
+def _flip_school(table):
+    return {"school": _lookup_flip(table, "school",
+                                   lambda s: IVY_SWAP_OUT if IVY(s) else IVY_SWAP_IN)}
+
+
+def _flip_gap_years(table):
+    return {"gap_years": np.where(table.gap_years > 0, 0, 3).astype(table.gap_years.dtype)}
+
+
+# Same edits as generate_counterfactuals, one attribute at a time. Each returns
+# only the replaced columns.
+ATTRIBUTE_FLIPS = {
+    "gender": _flip_gender,
+    "school": _flip_school,
+    "gap_years": _flip_gap_years,
+}
+
+
+def _as_table(resumes):
+    if isinstance(resumes, ResumeTable):
+        return resumes
+    if isinstance(resumes, pd.DataFrame):
+        return ResumeTable.from_frame(resumes)
+    return ResumeTable.from_dicts(resumes)
+
+
+def _with_columns(table, delta):
+    """Counterfactual view: shares every unchanged column array with the base table."""
+    codes = dict(table.codes)
+    codes.update({k: v for k, v in delta.items() if k in codes})
+    return ResumeTable(codes, table.skills, delta.get("gap_years", table.gap_years),
+                       table.vocab, uid=table.uid)
+
+
+def flip_combinations(attributes, max_order=None):
+    """Every non-empty combination of attributes: single flips, then intersections."""
+    attributes = list(attributes)
+    max_order = max_order or len(attributes)
+    for k in range(1, max_order + 1):
+        yield from itertools.combinations(attributes, k)
+
+
+def _default_scorers():
+    from ai_mock import ai_mock_score_batch
+    from personas import batch_personas
+    return {"AI Model": ai_mock_score_batch, **batch_personas}
+
+
+def _score_paired(fn, tables, seed=None):
+    """
+    Score base and counterfactual tables with the same noise, so a noisy
+    scorer's noise cancels within each pair instead of inflating shifts.
+    Scorers taking an `rng` get the same seeding.RowStream for every table;
+    others are replayed from the same global np.random state, seeded from the
+    same key and restored afterwards.
+    """
+    out = []
+    if "rng" in inspect.signature(fn).parameters:
+        noise = seeding.RowStream("counterfactual_audit", seed=seed)
+        for t in tables:
+            out.append(np.asarray(fn(t, rng=noise.at(0)), dtype=float))
+        return out
+    saved = np.random.get_state()
+    np.random.seed(seeding.seed_sequence("counterfactual_audit", seed=seed).generate_state(1)[0])
+    state = np.random.get_state()
+    try:
+        for t in tables:
+            np.random.set_state(state)
+            out.append(np.asarray(fn(t), dtype=float))
+    finally:
+        np.random.set_state(saved)
+    return out
+
+
+@timed("counterfactuals.counterfactual_audit", rows="arg")
+def counterfactual_audit(resumes, attributes=("gender", "school", "gap_years"), scorers=None,
+                         thresholds=None, max_order=None, z=1.96, seed=None):
+    """
+    Score every resume against each combination of attribute flips and summarize.
+
+    resumes: ResumeTable, flat DataFrame or list of resume dicts.
+    scorers: name → batch scorer (table → scores); defaults to ai_mock plus every persona.
+    thresholds: name → decision cut-off for the flip rate; defaults to the mean
+        base score (a median cut selects everyone on two-valued persona scores).
+    seed: seed for the noise of scorers that take an rng (config.RNG_SEED by default).
+
+    Returns a DataFrame with one row per (scorer, flip): n, mean score shift
+    (counterfactual − original), its normal-approximation confidence interval and
+    the fraction of decisions that change.
+    """
+    table = _as_table(resumes)
+    scorers = _default_scorers() if scorers is None else scorers
+    thresholds = thresholds or {}
+    unknown = set(attributes) - set(ATTRIBUTE_FLIPS)
+    if unknown:
+        raise ValueError(f"Unknown counterfactual attributes: {sorted(unknown)}")
+
+    # Build the deltas once; each combination just merges the single-attribute ones
+    single = {a: ATTRIBUTE_FLIPS[a](table) for a in attributes}
+    combos = list(flip_combinations(attributes, max_order))
+    cf_tables = []
+    for combo in combos:
+        delta = {}
+        for a in combo:
+            delta.update(single[a])
+        cf_tables.append(_with_columns(table, delta))
+
+    n = len(table)
+    rows = []
+    for name, fn in scorers.items():
+        base, *cfs = _score_paired(fn, [table] + cf_tables, seed)
+        cut = thresholds.get(name, base.mean() if n else 0.0)
+        selected = base >= cut
+        for combo, cf in zip(combos, cfs):
+            shift = cf - base
+            mean = shift.mean() if n else float("nan")
+            half = z * shift.std(ddof=1) / np.sqrt(n) if n > 1 else float("nan")
+            rows.append({
+                "scorer": name,
+                "flip": "+".join(combo),
+                "order": len(combo),
+                "n": n,
+                "mean_shift": mean,
+                "ci_low": mean - half,
+                "ci_high": mean + half,
+                "flip_rate": ((cf >= cut) != selected).mean() if n else float("nan"),
+            })
+    return pd.DataFrame(rows)
@@ -1,34 +1,103 @@
 # data_generator.py
-import random
 import numpy as np
-from models import normalize_resume, make_uid
 import config
+from models import ResumeTable, Vocab, SKILL_POOL
+import seeding
+from instrumentation import timed
 
-random.seed(config.RNG_SEED)
-np.random.seed(config.RNG_SEED)
 
 IVY_SCHOOLS = ["Harvard","Stanford","MIT","Yale","Princeton","Columbia","UPenn","Brown","Dartmouth","Cornell"]
 FAANG_EMPLOYERS = ["Google","Facebook","Amazon","Apple","Netflix","Microsoft","Meta"]
 
-SKILL_POOL = ["python","sql","java","react","nlp","computer vision","ml","docker","kubernetes","aws","data analysis"]
+# Fixed vocabularies for the columnar generator: prestige entries first, then the
+# numbered fallbacks, so a code is just an index into these lists.
+N_STATE_SCHOOLS = 200
+N_COMPANIES = 500
+SCHOOLS = IVY_SCHOOLS + [f"State University {i}" for i in range(1, N_STATE_SCHOOLS + 1)]
+EMPLOYERS = FAANG_EMPLOYERS + [f"Company{i}" for i in range(1, N_COMPANIES + 1)]
+GENDERS = ["male", "female"]
 
+# Shared by every generated chunk so chunks concatenate without remapping codes.
+VOCAB = ResumeTable.empty_vocab()
+VOCAB.update(school=Vocab(SCHOOLS), employer=Vocab(EMPLOYERS), name=Vocab(["ANON"]),
+             degree=Vocab(["BSc"]), year=Vocab([2016]), title=Vocab(["Engineer"]),
+             start=Vocab(["2017-01"]), end=Vocab(["2021-01"]))
+_GENDER_CODES = np.array([VOCAB["gender"].index[g] for g in GENDERS], dtype=np.int8)
+
+CHUNK_SIZE = 65536
+# Rows per RNG block. Each column of each block gets its own stream derived from
+# RNG_SEED, which keeps the output independent of the chunk size callers ask for
+# and lets the last block be drawn only as far as it is needed.
+_BLOCK_SIZE = 65536
+
+
+def _column_rng(block, column):
+    return seeding.stream(block, column)
+
+
+def _generate_block(block, n=_BLOCK_SIZE):
+    """Draw the first n rows of a block as columns; a prefix of the full block."""
+    def rng(column):
+        return _column_rng(block, column)
+
+    prestige = rng("prestige").random(n) < 0.18
+    school = np.where(prestige,
+                      rng("ivy_school").integers(0, len(IVY_SCHOOLS), n),
+                      len(IVY_SCHOOLS) + rng("state_school").integers(0, N_STATE_SCHOOLS, n))
+    brand = rng("brand").random(n) < 0.15
+    employer = np.where(brand,
+                        rng("faang_employer").integers(0, len(FAANG_EMPLOYERS), n),
+                        len(FAANG_EMPLOYERS) + rng("other_employer").integers(0, N_COMPANIES, n))
+    gap_years = np.where(rng("has_gap").random(n) > 0.15, 0,
+                         rng("gap_years").integers(1, 4, n)).astype(np.int8)
+    gender = _GENDER_CODES[rng("gender").integers(0, len(GENDERS), n)]
+
+    # Sample k distinct skills per row: rank random keys and keep the k smallest.
+    k = rng("n_skills").integers(2, 7, n)
+    ranks = rng("skills").random((n, len(SKILL_POOL))).argsort(axis=1).argsort(axis=1)
+    bits = np.left_shift(1, np.arange(len(SKILL_POOL)), dtype=np.int64)
+    skills = ((ranks < k[:, None]) * bits).sum(axis=1).astype(np.uint64)
+
+    zeros = np.zeros(n, dtype=np.int32)
+    codes = {"name": zeros, "degree": zeros, "year": zeros, "title": zeros, "start": zeros, "end": zeros,
+             "school": school.astype(np.int32), "employer": employer.astype(np.int32), "gender": gender}
+    # uids follow from the seed and global row index, so generated resumes (and
+    # everything keyed on their uid) are the same in every process
+    first = block * _BLOCK_SIZE
+    uid = np.array([f"synthetic-{config.RNG_SEED}-{i}" for i in range(first, first + n)], dtype=object)
+    return ResumeTable(codes, skills, gap_years, VOCAB, uid=uid)
+
+
+def generate_chunks(n, chunk_size=CHUNK_SIZE):
+    """
+    Yield n synthetic resumes as ResumeTable chunks of at most chunk_size rows.
+    The rows are the same for any chunk_size given the same config.RNG_SEED.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    pending = []
+    pending_rows = 0
+    produced = 0
+    block = 0
+    while produced < n:
+        while pending_rows < min(chunk_size, n - produced):
+            # Only the last block can be partial, so drawing just what's left is safe
+            table = _generate_block(block, min(_BLOCK_SIZE, n - produced - pending_rows))
+            block += 1
+            pending.append(table)
+            pending_rows += len(table)
+        buf = ResumeTable.concat(pending) if len(pending) > 1 else pending[0]
+        take = min(chunk_size, n - produced)
+        yield buf[:take]
+        rest = buf[take:]
+        pending = [rest] if len(rest) else []
+        pending_rows = len(rest)
+        produced += take
+
+
+@timed("data_generator.generate_synthetic", rows="result")
 def generate_synthetic(n=200):
     rows = []
-    for i in range(n):
-        prestige = random.random() < 0.18
-        school = random.choice(IVY_SCHOOLS) if prestige else f"State University {random.randint(1,200)}"
-        employer = random.choice(FAANG_EMPLOYERS) if random.random() < 0.15 else f"Company{random.randint(1,500)}"
-        gap_years = 0 if random.random() > 0.15 else random.choice([1,2,3])
-        gender = random.choice(["male","female"])
-        skills = random.sample(SKILL_POOL, k=random.randint(2,6))
-        resume = {
-            "uid": make_uid(),
-            "name": "ANON",
-            "education": [{"school": school, "degree": "BSc", "year": 2016}],
-            "jobs": [{"employer": employer, "title": "Engineer", "start":"2017-01", "end":"2021-01"}],
-            "skills": skills,
-            "gender": gender,
-            "gap_years": gap_years
-        }
-        rows.append(normalize_resume(resume))
+    for chunk in generate_chunks(n):
+        rows.extend(chunk.to_dicts())
     return rows
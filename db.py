@@ -1,14 +1,29 @@
 # db.py
-from sqlalchemy import create_engine, Column, Integer, String, JSON, DateTime
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from contextlib import contextmanager
+from itertools import islice
+from sqlalchemy import (create_engine, event, insert, select, func, Column, Integer, String, JSON,
+                        DateTime, Float, Text, ForeignKey, Index)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import datetime
 import config
+from instrumentation import count, timed
 
 Base = declarative_base()
 _engine = None
 _Session = None
 
+# Rows per executemany call in the bulk paths
+BULK_BATCH_SIZE = 10_000
+
 class Resume(Base):
     __tablename__ = 'resumes'
     id = Column(Integer, primary_key=True)
@@ -21,39 +36,496 @@ class RunResult(Base):
     id = Column(Integer, primary_key=True)
     run_name = Column(String, index=True)
     meta = Column(JSON)                     # ✅ renamed from metadata → meta
-    results = Column(JSON)
+    results = Column(JSON)                  # legacy: per-run trial blob, superseded by trials
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class Trial(Base):
+    __tablename__ = 'trials'
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey('runs.id'), nullable=False, index=True)
+    resume_id = Column(Integer, ForeignKey('resumes.id'), index=True)
+    resume_uid = Column(String)
+    persona = Column(String, nullable=False)
+    ai_score = Column(Float)
+    persona_score = Column(Float)
+    choice = Column(Integer)
+    correct = Column(Integer)
+    explanation = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    __table_args__ = (Index('ix_trials_persona_created_at', 'persona', 'created_at'),)
+
+class Calibration(Base):
+    __tablename__ = 'calibrations'
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, index=True)   # scorer / persona
+    breakpoints = Column(JSON)                          # {"x": [...], "y": [...]}
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL lets readers proceed during bulk writes; NORMAL sync is durable under WAL
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA cache_size=-65536")      # 64 MiB page cache
+    cur.execute("PRAGMA mmap_size=268435456")
+    cur.close()
+
 def init_db():
     global _engine, _Session
     if config.DB_MODE == "postgres":
         if not config.POSTGRES_URL:
             raise RuntimeError("POSTGRES_URL must be set for postgres mode")
-        _engine = create_engine(config.POSTGRES_URL)
+        _engine = create_engine(
+            config.POSTGRES_URL,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=config.DB_POOL_RECYCLE,
+            executemany_mode="values_plus_batch",
+        )
     else:
-        _engine = create_engine("sqlite:///rt_test.db", connect_args={"check_same_thread": False})
-    _Session = sessionmaker(bind=_engine)
+        _engine = create_engine(config.SQLITE_URL, connect_args={"check_same_thread": False})
+        event.listen(_engine, "connect", _sqlite_pragmas)
+    _Session = sessionmaker(bind=_engine, expire_on_commit=False)
     Base.metadata.create_all(_engine)
 
+def get_engine():
+    if _engine is None:
+        init_db()
+    return _engine
+
 def get_session():
     global _Session
     if _Session is None:
         init_db()
     return _Session()
 
-def save_resume(uid, json_payload):
+@contextmanager
+def session_scope():
+    """Session that commits on success, rolls back on error and is always closed."""
     s = get_session()
-    r = Resume(uid=uid, json=json_payload)
-    s.add(r)
-    s.commit()
-    s.refresh(r)
+    try:
+        yield s
+        s.commit()
+    except Exception:
+        s.rollback()
+        raise
+    finally:
+        s.close()
+
+@timed("db.save_resume")
+def save_resume(uid, json_payload):
+    with session_scope() as s:
+        r = Resume(uid=uid, json=json_payload)
+        s.add(r)
+        s.flush()
     return r
 
+@timed("db.save_run_result")
 def save_run_result(run_name, metadata, results):
-    """Save experiment/run results"""
-    s = get_session()
-    rr = RunResult(run_name=run_name, meta=metadata, results=results)  # ✅ use meta
-    s.add(rr)
-    s.commit()
-    s.refresh(rr)
-    return rr
+    """Save experiment/run results; each trial becomes a row in the trials table. Returns the run id."""
+    return bulk_save_runs([(run_name, metadata, results)])[0]
+
+@timed("db.save_calibration")
+def save_calibration(name, breakpoints):
+    """Store a calibrator's breakpoints; the newest row per name is the current one."""
+    with session_scope() as s:
+        s.add(Calibration(name=name, breakpoints=breakpoints))
+
+@timed("db.load_calibration")
+def load_calibration(name):
+    """Newest breakpoints stored for name, or None."""
+    query = (select(Calibration.breakpoints).where(Calibration.name == name)
+             .order_by(Calibration.id.desc()).limit(1))
+    with get_engine().connect() as conn:
+        return conn.execute(query).scalar()
+
+def _batches(rows, size):
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+def _insert_ignoring(conn, table, index_elements):
+    """INSERT that skips rows conflicting on index_elements (SQLite and Postgres)."""
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"skip_existing isn't supported on {conn.dialect.name}")
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=index_elements)
+
+def _bulk_insert(table, rows, batch_size, conflict_keys=None):
+    """
+    executemany inserts of `rows` in batches, all inside one transaction. With
+    conflict_keys, rows clashing with existing ones on those columns are skipped.
+    Returns the number of rows inserted.
+    """
+    n = 0
+    with get_engine().begin() as conn:
+        stmt = insert(table) if conflict_keys is None else _insert_ignoring(conn, table, conflict_keys)
+        for batch in _batches(rows, batch_size):
+            result = conn.execute(stmt, batch)
+            n += len(batch) if conflict_keys is None else max(result.rowcount, 0)
+    return n
+
+@timed("db.bulk_save_resumes", rows="arg")
+def bulk_save_resumes(resumes, batch_size=BULK_BATCH_SIZE, skip_existing=True):
+    """
+    Insert many resumes in one transaction. Accepts resume dicts (uid taken from
+    each) or a models.ResumeTable. Resumes whose uid is already stored are
+    skipped, so re-ingesting a file or overlapping exports is safe; with
+    skip_existing=False a duplicate uid raises IntegrityError instead.
+    Returns the number of rows written.
+    """
+    if hasattr(resumes, "to_dicts"):
+        resumes = resumes.to_dicts()
+    now = datetime.datetime.utcnow()
+    rows = ({"uid": str(r["uid"]), "json": r, "created_at": now} for r in resumes)
+    return _bulk_insert(Resume.__table__, rows, batch_size, ["uid"] if skip_existing else None)
+
+def _resume_ids(conn, trials, now):
+    """Map each trial's resume uid to resumes.id, inserting resumes not stored yet."""
+    resumes = {}
+    for t in trials:
+        r = t.get("resume")
+        if isinstance(r, dict) and r.get("uid") is not None:
+            resumes.setdefault(str(r["uid"]), r)
+    ids = {}
+    uids = list(resumes)
+    for batch in _batches(uids, 900):     # stay under SQLite's bound-parameter limit
+        ids.update(conn.execute(select(Resume.uid, Resume.id).where(Resume.uid.in_(batch))).all())
+    missing = [{"uid": u, "json": resumes[u], "created_at": now} for u in uids if u not in ids]
+    if missing:
+        conn.execute(insert(Resume.__table__), missing)
+        for batch in _batches([m["uid"] for m in missing], 900):
+            ids.update(conn.execute(select(Resume.uid, Resume.id).where(Resume.uid.in_(batch))).all())
+    return ids
+
+def _trial_rows(run_id, trials, resume_ids, now):
+    for t in trials:
+        r = t.get("resume")
+        uid = str(r["uid"]) if isinstance(r, dict) and r.get("uid") is not None else t.get("resume_uid")
+        yield {
+            "run_id": run_id,
+            "resume_id": resume_ids.get(uid),
+            "resume_uid": uid,
+            "persona": t["persona"],
+            "ai_score": float(t["ai_score"]),
+            "persona_score": float(t["persona_score"]),
+            "choice": None if t.get("choice") is None else int(t["choice"]),
+            "correct": int(t["correct"]),
+            "explanation": t.get("explanation"),
+            "created_at": t.get("timestamp", now),
+        }
+
+@timed("db.bulk_save_runs")
+def bulk_save_runs(runs, batch_size=BULK_BATCH_SIZE):
+    """
+    Insert many runs in one transaction. Each run is a (run_name, metadata,
+    trials) tuple; trials are dicts with persona, ai_score, persona_score,
+    correct and optionally choice, explanation, timestamp and the resume.
+    Returns the new run ids.
+    """
+    now = datetime.datetime.utcnow()
+    run_ids = []
+    with get_engine().begin() as conn:
+        for name, meta, trials in runs:
+            trials = list(trials)
+            run_id = conn.execute(insert(RunResult.__table__).values(
+                run_name=name, meta=meta, created_at=now)).inserted_primary_key[0]
+            resume_ids = _resume_ids(conn, trials, now)
+            for batch in _batches(_trial_rows(run_id, trials, resume_ids, now), batch_size):
+                conn.execute(insert(Trial.__table__), batch)
+            run_ids.append(run_id)
+    return run_ids
+
+# -----------------------------
+# Write-behind queue
+# -----------------------------
+_STOP = object()
+_writer = None
+
+def _is_transient(exc):
+    """
+    Errors worth retrying: invalidated connections, disconnects, pool timeouts
+    and locked/busy SQLite files. Other OperationalErrors (missing tables,
+    failed authentication) won't clear up on their own.
+    """
+    from sqlalchemy import exc as sa_exc
+    if isinstance(exc, sa_exc.DBAPIError) and exc.connection_invalidated:
+        return True
+    if isinstance(exc, (sa_exc.DisconnectionError, sa_exc.TimeoutError)):
+        return True
+    if isinstance(exc, sa_exc.OperationalError):
+        message = str(exc.orig).lower()
+        return "database is locked" in message or "database is busy" in message
+    return False
+
+def _json_default(o):
+    if hasattr(o, "item"):          # numpy scalars
+        return o.item()
+    if hasattr(o, "isoformat"):
+        return o.isoformat()
+    return str(o)
+
+# Serializes appends with replay_dead_letter claiming the file
+_dead_letter_lock = threading.Lock()
+
+def write_dead_letter(runs, error, path=None):
+    """Append runs that could not be saved, one JSON line each, for replay_dead_letter."""
+    path = path or config.DB_DEAD_LETTER_PATH
+    with _dead_letter_lock, open(path, "a", encoding="utf-8") as fh:
+        for name, meta, trials in runs:
+            fh.write(json.dumps({"run_name": name, "metadata": meta, "results": trials,
+                                 "error": repr(error)}, default=_json_default) + "\n")
+
+def replay_dead_letter(path=None):
+    """
+    Save the runs in a dead-letter file in one transaction. Returns the run ids.
+    The file is first moved to <path>.replaying, so runs dead-lettered during
+    the replay start a new file instead of being deleted with the old one. A
+    .replaying file left by a failed replay is merged with the new runs and
+    retried.
+    """
+    path = path or config.DB_DEAD_LETTER_PATH
+    claimed = path + ".replaying"
+    with _dead_letter_lock:
+        if os.path.exists(path):
+            if os.path.exists(claimed):
+                with open(path, "rb") as src, open(claimed, "ab") as dst:
+                    dst.write(src.read())
+                os.remove(path)
+            else:
+                os.replace(path, claimed)
+    if not os.path.exists(claimed):
+        return []
+    with open(claimed, encoding="utf-8") as fh:
+        runs = [(r["run_name"], r["metadata"], r["results"]) for r in map(json.loads, fh)]
+    for _, _, trials in runs:
+        for t in trials:
+            if isinstance(t.get("timestamp"), str):
+                t["timestamp"] = datetime.datetime.fromisoformat(t["timestamp"])
+    run_ids = bulk_save_runs(runs)
+    os.remove(claimed)
+    return run_ids
+
+class WriteBehindQueue:
+    """
+    Saves runs on a background thread so callers never wait on the database.
+
+    submit() puts a run on a bounded queue and returns a Future for its run id;
+    it only blocks when `maxsize` runs are already waiting. The writer drains
+    up to `batch_size` queued runs into one bulk_save_runs transaction. A
+    transient failure rolls the transaction back and the same batch is retried
+    with exponential backoff, up to `max_retries` times; any other error is
+    retried run by run so one bad run fails alone. Runs that still can't be
+    saved fail their Futures and go to the dead-letter file (see
+    replay_dead_letter), so the queue keeps draining. Queued runs are flushed
+    at interpreter exit.
+    """
+
+    def __init__(self, maxsize=None, batch_size=None, max_backoff=None, max_retries=None,
+                 dead_letter_path=None):
+        self.batch_size = batch_size or config.DB_WRITE_BATCH
+        self.max_backoff = config.DB_WRITE_MAX_BACKOFF if max_backoff is None else max_backoff
+        self.max_retries = config.DB_WRITE_MAX_RETRIES if max_retries is None else max_retries
+        self.dead_letter_path = dead_letter_path or config.DB_DEAD_LETTER_PATH
+        self._queue = queue.Queue(maxsize or config.DB_WRITE_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0           # submitted but not yet written or failed
+        self._pending_trials = 0
+        self._thread = None
+        self._closed = False
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.last_error = None
+
+    def submit(self, run_name, metadata, results, timeout=None):
+        """Queue a run (as for save_run_result); raises queue.Full after timeout seconds."""
+        trials = list(results)
+        fut = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("write-behind queue is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self._pending += 1
+            self._pending_trials += len(trials)
+        try:
+            self._queue.put((run_name, metadata, trials, fut), timeout=timeout)
+        except queue.Full:
+            self._done([(run_name, metadata, trials, fut)])
+            raise
+        return fut
+
+    def backlog(self):
+        """Runs and trials not yet written, plus writer totals and the last error."""
+        with self._lock:
+            return {"runs": self._pending, "trials": self._pending_trials, "written": self.written,
+                    "failed": self.failed, "retries": self.retries,
+                    "last_error": None if self.last_error is None else repr(self.last_error)}
+
+    def flush(self, timeout=None):
+        """Wait until everything submitted so far is written (or failed); False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout=60):
+        """Stop accepting runs, write what is queued and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        if not self.flush(timeout):
+            warnings.warn(f"db write-behind queue closed with {self.backlog()['runs']} unsaved runs")
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._write(batch)
+                    return
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch):
+        delay, attempt = 0.1, 0
+        while True:
+            try:
+                run_ids = bulk_save_runs([(name, meta, trials) for name, meta, trials, _ in batch])
+                break
+            except Exception as e:
+                with self._lock:
+                    self.last_error = e
+                transient = _is_transient(e)
+                if transient and attempt < self.max_retries:
+                    attempt += 1
+                    with self._lock:
+                        self.retries += 1
+                    count("db_write_retries")
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff)
+                    continue
+                if not transient and len(batch) > 1:
+                    for item in batch:
+                        self._write([item])
+                    return
+                self._fail(batch, e)
+                return
+        for (_, _, _, fut), run_id in zip(batch, run_ids):
+            fut.set_result(run_id)
+        with self._lock:
+            self.written += len(batch)
+        count("db_runs_written", len(batch))
+        self._done(batch)
+
+    def _fail(self, batch, error):
+        try:
+            write_dead_letter([(name, meta, trials) for name, meta, trials, _ in batch], error,
+                              self.dead_letter_path)
+        except Exception as e:
+            error = e
+        for *_, fut in batch:
+            fut.set_exception(error)
+        with self._lock:
+            self.failed += len(batch)
+        count("db_runs_dead_lettered", len(batch))
+        self._done(batch)
+
+    def _done(self, batch):
+        with self._idle:
+            self._pending -= len(batch)
+            self._pending_trials -= sum(len(trials) for _, _, trials, _ in batch)
+            self._idle.notify_all()
+
+def get_writer():
+    """The process-wide write-behind queue, created on first use."""
+    global _writer
+    if _writer is None:
+        _writer = WriteBehindQueue()
+    return _writer
+
+def save_run_result_async(run_name, metadata, results):
+    """save_run_result without waiting: queues the run and returns a Future for its id."""
+    return get_writer().submit(run_name, metadata, results)
+
+# -----------------------------
+# Reporting queries (aggregated in SQL)
+# -----------------------------
+def _trial_filter(query, since=None, until=None, run_id=None, persona=None):
+    if since is not None:
+        query = query.where(Trial.created_at >= since)
+    if until is not None:
+        query = query.where(Trial.created_at < until)
+    if run_id is not None:
+        query = query.where(Trial.run_id == run_id)
+    if persona is not None:
+        query = query.where(Trial.persona == persona)
+    return query
+
+@timed("db.accuracy_by_persona")
+def accuracy_by_persona(since=None, until=None, run_id=None):
+    """Per-persona trial count, accuracy and mean scores, e.g. over the last month."""
+    query = _trial_filter(select(
+        Trial.persona,
+        func.count().label("n"),
+        func.sum(Trial.correct).label("correct"),
+        func.avg(Trial.correct).label("accuracy"),
+        func.avg(Trial.ai_score).label("mean_ai_score"),
+        func.avg(Trial.persona_score).label("mean_persona_score"),
+    ).group_by(Trial.persona), since, until, run_id)
+    with get_engine().connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(query.order_by(Trial.persona))]
+
+@timed("db.accuracy_by_run")
+def accuracy_by_run(since=None, until=None, persona=None):
+    """Per-run trial count and accuracy, newest run first."""
+    query = _trial_filter(select(
+        Trial.run_id,
+        RunResult.run_name,
+        RunResult.created_at,
+        func.count().label("n"),
+        func.avg(Trial.correct).label("accuracy"),
+    ).join(RunResult, RunResult.id == Trial.run_id)
+     .group_by(Trial.run_id, RunResult.run_name, RunResult.created_at), since, until, persona=persona)
+    with get_engine().connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(query.order_by(RunResult.created_at.desc()))]
+
+@timed("db.load_trials")
+def load_trials(run_id=None, since=None, until=None, persona=None, chunksize=None):
+    """Trial rows as a DataFrame, filtered in SQL. With chunksize, an iterator of
+    DataFrames holding at most chunksize rows each."""
+    import pandas as pd
+    query = _trial_filter(select(Trial.__table__), since, until, run_id, persona)
+    if chunksize is None:
+        with get_engine().connect() as conn:
+            return pd.read_sql(query, conn)
+    return _read_chunks(query, chunksize)
+
+def _read_chunks(query, chunksize):
+    import pandas as pd
+    with get_engine().connect() as conn:
+        yield from pd.read_sql(query.order_by(Trial.id), conn, chunksize=chunksize)
@@ -0,0 +1,143 @@
+# fairness.py
+"""
+Group-fairness metrics over encoded protected attributes.
+
+Attribute columns are factorized once and combined into a single cell code
+per row, so every per-group count (rows, selections, true/false positives)
+is one np.bincount over that code. This scales to millions of rows and
+hundreds of intersectional cells; `group_rates` is the building block the
+report and mitigation use.
+"""
+import numpy as np
+import pandas as pd
+
+from matcher import IVY, PRESTIGE
+from instrumentation import timed
+
+# Attributes the audit slices by, and their buckets
+PROTECTED_ATTRIBUTES = ("gender", "school_tier", "gap")
+GAP_BUCKETS = ("0", "1", "2+")
+
+
+def protected_attributes(resumes):
+    """
+    Gender, school tier (ivy / prestige / other) and gap-year bucket per resume,
+    as a DataFrame of categoricals. Accepts a models.ResumeTable, a DataFrame
+    with flat resume columns or a list of resume dicts.
+    """
+    if isinstance(resumes, (list, tuple)):
+        from models import ResumeTable
+        resumes = ResumeTable.from_dicts(resumes)
+    school = resumes["education_school"]
+    tier = np.where(IVY.match_many(school), "ivy",
+                    np.where(PRESTIGE.match_many(school), "prestige", "other"))
+    gap = np.clip(np.asarray(resumes["gap_years"], dtype=np.int64), 0, len(GAP_BUCKETS) - 1)
+    return pd.DataFrame({
+        "gender": pd.Categorical(np.asarray(resumes["gender"], dtype=object)),
+        "school_tier": pd.Categorical(tier, categories=["ivy", "prestige", "other"]),
+        "gap": pd.Categorical.from_codes(gap, GAP_BUCKETS),
+    })
+
+
+def select(scores, threshold=None):
+    """Selection indicator; the default median threshold is LL144's "scoring rate"."""
+    scores = np.asarray(scores, dtype=float)
+    return scores > (np.median(scores) if threshold is None else threshold)
+
+
+def encode_groups(groups):
+    """
+    (codes, cells): a cell code per row and a DataFrame with the attribute values
+    of each cell. groups is a DataFrame, a dict of columns or a single column.
+    Missing values form their own group.
+    """
+    if isinstance(groups, pd.DataFrame):
+        columns = {c: groups[c] for c in groups.columns}
+    elif isinstance(groups, dict):
+        columns = groups
+    else:
+        columns = {getattr(groups, "name", None) or "group": groups}
+
+    combined = None
+    levels = {}
+    for name, col in columns.items():
+        codes, uniques = pd.factorize(pd.Series(col), sort=True, use_na_sentinel=False)
+        levels[name] = uniques
+        combined = codes.astype(np.int64) if combined is None else combined * len(uniques) + codes
+    # Renumber to the cells actually present so counts stay dense
+    codes, present = pd.factorize(combined, sort=True)
+    cells, rest = {}, np.asarray(present, dtype=np.int64)
+    for name in reversed(list(columns)):
+        rest, idx = np.divmod(rest, len(levels[name]))
+        cells[name] = np.asarray(levels[name])[idx]
+    return codes, pd.DataFrame({name: cells[name] for name in columns})
+
+
+@timed("fairness.group_rates", rows="arg")
+def group_rates(selected, groups, labels=None, min_count=1, weights=None):
+    """
+    Per-cell counts and rates in one pass: n, selected, selection_rate and
+    impact_ratio (selection rate over the highest cell's rate). With labels
+    (true outcomes) also tpr and fpr. Cells with fewer than min_count rows are
+    reported but excluded from the impact-ratio reference, as LL144 allows for
+    small categories.
+    """
+    codes, cells = encode_groups(groups)
+    k = len(cells)
+    selected = np.asarray(selected, dtype=float)
+    w = np.ones(len(codes)) if weights is None else np.asarray(weights, dtype=float)
+    out = cells.copy()
+    out["n"] = np.bincount(codes, minlength=k)
+    out["selected"] = np.bincount(codes, weights=w * selected, minlength=k)
+    total = np.bincount(codes, weights=w, minlength=k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["selection_rate"] = out["selected"] / total
+        eligible = out["n"] >= min_count
+        best = out["selection_rate"][eligible].max() if eligible.any() else np.nan
+        out["impact_ratio"] = np.where(eligible, out["selection_rate"] / best, np.nan)
+        if labels is not None:
+            pos = np.asarray(labels, dtype=float)
+            out["tpr"] = (np.bincount(codes, weights=w * selected * pos, minlength=k)
+                          / np.bincount(codes, weights=w * pos, minlength=k))
+            out["fpr"] = (np.bincount(codes, weights=w * selected * (1 - pos), minlength=k)
+                          / np.bincount(codes, weights=w * (1 - pos), minlength=k))
+    return out
+
+
+def demographic_parity(rates):
+    """Largest gap and smallest ratio between cell selection rates."""
+    r = rates["selection_rate"].dropna()
+    return {"difference": float(r.max() - r.min()), "ratio": float(r.min() / r.max()) if r.max() else np.nan}
+
+
+def equalized_odds(rates):
+    """Largest gap in TPR and FPR across cells; the overall difference is the worse of the two."""
+    tpr_gap = float(rates["tpr"].max() - rates["tpr"].min())
+    fpr_gap = float(rates["fpr"].max() - rates["fpr"].min())
+    return {"difference": max(tpr_gap, fpr_gap), "tpr_difference": tpr_gap, "fpr_difference": fpr_gap}
+
+
+def fairness_summary(selected, groups, labels=None, min_count=1):
+    """Per-attribute and intersectional summary: one row per slice with worst impact ratio and parity gaps."""
+    if not isinstance(groups, pd.DataFrame):
+        groups = pd.DataFrame(groups)
+    slices = [[c] for c in groups.columns]
+    if len(groups.columns) > 1:
+        slices.append(list(groups.columns))
+    rows = []
+    for cols in slices:
+        rates = group_rates(selected, groups[cols], labels, min_count)
+        row = {"slice": " × ".join(cols), "cells": len(rates),
+               "min_impact_ratio": float(rates["impact_ratio"].min()),
+               "parity_difference": demographic_parity(rates)["difference"]}
+        if labels is not None:
+            row["equalized_odds_difference"] = equalized_odds(rates)["difference"]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def intersectional_rates(selected, resumes, labels=None, min_count=1,
+                         attributes=PROTECTED_ATTRIBUTES):
+    """group_rates over the gender × school tier × gap cells of `resumes`."""
+    groups = protected_attributes(resumes)[list(attributes)]
+    return group_rates(selected, groups, labels, min_count)
@@ -0,0 +1,117 @@
+# import_budget.py
+"""
+Import-time budget check.
+
+Each module is imported in a fresh interpreter under `python -X importtime`,
+so the cumulative cost includes everything it pulls in (pandas, sqlalchemy, …)
+and nothing cached from earlier imports. The best of a few runs is compared
+with BUDGETS_MS, scaled by config.IMPORT_BUDGET_SCALE for slower machines.
+
+    python import_budget.py                # all budgeted modules
+    python import_budget.py analytics db   # just these
+    python import_budget.py --json out.json
+
+Exits non-zero when any module is over budget.
+"""
+import json
+import re
+import subprocess
+import sys
+
+import config
+
+# Cold-import budgets (ms). Modules on the app's startup path must not pull in
+# scipy / sklearn / matplotlib; those are imported where they are used.
+BUDGETS_MS = {
+    "accumulators": 300,
+    "analytics": 300,
+    "data_generator": 300,
+    "models": 300,
+    "matcher": 800,
+    "personas": 800,
+    "ai_mock": 800,
+    "counterfactuals": 800,
+    "fairness": 800,
+    "mitigation": 800,
+    "report": 800,
+    "bootstrap": 800,
+    "ingest": 800,
+    "db": 800,
+    "scoring": 1000,
+    "cache": 1000,
+}
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module, runs=3):
+    """
+    Cold import cost of `module`: {"module", "total_ms", "heaviest"} where
+    heaviest lists the five most expensive transitive imports (cumulative ms).
+    """
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True)
+        if proc.returncode:
+            raise ImportError(f"importing {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+        entries = []
+        total = None
+        for line in proc.stderr.splitlines():
+            m = _LINE.match(line)
+            if not m:
+                continue
+            cumulative, name = int(m.group(2)), m.group(4)
+            if name == module and len(m.group(3)) == 1:
+                total = cumulative
+            else:
+                entries.append((cumulative, name))
+        if total is not None and (best is None or total < best[0]):
+            best = (total, entries)
+    if best is None:
+        raise ImportError(f"no import-time data for {module}")
+    total, entries = best
+    heaviest = sorted(entries, reverse=True)[:5]
+    return {"module": module, "total_ms": total / 1000,
+            "heaviest": [{"module": name, "ms": us / 1000} for us, name in heaviest]}
+
+
+def check(modules=None, budgets=None, runs=3):
+    """Measure each module against its budget. Returns (results, over_budget)."""
+    budgets = BUDGETS_MS if budgets is None else budgets
+    modules = list(budgets) if not modules else modules
+    results, over = [], []
+    for module in modules:
+        r = measure(module, runs)
+        budget = budgets.get(module)
+        r["budget_ms"] = None if budget is None else budget * config.IMPORT_BUDGET_SCALE
+        results.append(r)
+        if r["budget_ms"] is not None and r["total_ms"] > r["budget_ms"]:
+            over.append(r)
+    return results, over
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    out = None
+    if "--json" in args:
+        i = args.index("--json")
+        out = args[i + 1]
+        del args[i:i + 2]
+    results, over = check(args)
+    for r in results:
+        budget = "-" if r["budget_ms"] is None else f"{r['budget_ms']:.0f}"
+        flag = "  OVER" if r in over else ""
+        heaviest = ", ".join(f"{h['module']} {h['ms']:.0f}" for h in r["heaviest"][:3])
+        print(f"{r['module']:<16} {r['total_ms']:8.1f} ms  budget {budget:>5}{flag}   ({heaviest})")
+    if out:
+        with open(out, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    if over:
+        print(f"{len(over)} module(s) over their import budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# ingest.py
+"""
+Streaming resume ingestion for CSV/JSONL dumps that don't fit in memory.
+
+Files are read in bounded chunks and each chunk becomes a models.ResumeTable.
+Low-cardinality fields (school, employer, degree, gender, skills ...) share
+one vocabulary, so their codes stay consistent across the whole file; free-text
+fields with a value per resume get a fresh vocabulary per chunk, so memory stays
+bounded by the chunk size (ResumeTable.concat remaps them if chunks are joined).
+`ingest` chains the reader with batch scoring and the db bulk path.
+"""
+import gzip
+import json
+from itertools import islice
+
+import pandas as pd
+
+import seeding
+from models import ResumeTable, Vocab
+
+CHUNK_SIZE = 50_000
+
+# Near-unique per resume; interned per chunk rather than for the whole file
+CHUNK_LOCAL_FIELDS = ("name", "title", "start", "end")
+
+# Explicit dtypes for the flat CSV export (see assets/sample_resumes.csv);
+# other columns fall back to pandas inference.
+CSV_DTYPES = {
+    "uid": "string",
+    "name": "string",
+    "education_school": "string",
+    "jobs_employer": "string",
+    "skills": "string",
+    "gender": "string",
+    "gap_years": "Int8",
+}
+
+
+def _format(fp, fmt):
+    if fmt:
+        return fmt
+    name = str(fp).lower().removesuffix(".gz")
+    return "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _chunk_vocab(shared):
+    return {**shared, **{f: Vocab() for f in CHUNK_LOCAL_FIELDS}}
+
+
+def _csv_chunks(fp, chunk_size, vocab, uid_prefix):
+    with pd.read_csv(fp, dtype=CSV_DTYPES, chunksize=chunk_size) as reader:
+        for df in reader:
+            if uid_prefix is not None:
+                # chunked read_csv keeps a running RangeIndex, i.e. the file row
+                row_uids = pd.Series([f"{uid_prefix}-{i}" for i in df.index], index=df.index)
+                df["uid"] = df["uid"].fillna(row_uids) if "uid" in df else row_uids
+            yield ResumeTable.from_frame(df, _chunk_vocab(vocab))
+
+
+def _jsonl_chunks(fp, chunk_size, vocab, uid_prefix):
+    opener = gzip.open if str(fp).endswith(".gz") else open
+    with opener(fp, "rt", encoding="utf-8") as fh:
+        lines = (line for line in fh if line.strip())
+        row = 0
+        while True:
+            batch = [json.loads(line) for line in islice(lines, chunk_size)]
+            if not batch:
+                return
+            if uid_prefix is not None:
+                for i, r in enumerate(batch, row):
+                    if r.get("uid") is None:
+                        r["uid"] = f"{uid_prefix}-{i}"
+            row += len(batch)
+            yield ResumeTable.from_dicts(batch, _chunk_vocab(vocab))
+
+
+def iter_resume_chunks(fp, chunk_size=CHUNK_SIZE, fmt=None, vocab=None, uid_prefix=None):
+    """
+    Yield ResumeTable chunks of at most chunk_size resumes from a CSV or JSONL
+    file (optionally gzipped). Flat CSV rows go through the columnar
+    ResumeTable.from_frame; JSONL rows are nested resume dicts. `vocab` is
+    shared by every chunk except for CHUNK_LOCAL_FIELDS. With uid_prefix,
+    rows without a uid get f"{uid_prefix}-{row}" instead of a random one.
+    """
+    vocab = ResumeTable.empty_vocab() if vocab is None else vocab
+    if _format(fp, fmt) == "jsonl":
+        return _jsonl_chunks(fp, chunk_size, vocab, uid_prefix)
+    return _csv_chunks(fp, chunk_size, vocab, uid_prefix)
+
+
+def ingest(fp, chunk_size=CHUNK_SIZE, fmt=None, score=True, save=True):
+    """
+    Pipeline: read chunk → score with ai_mock and every persona → bulk-save.
+    Yields (chunk, scores) per chunk; scores is a DataFrame with an "AI Model"
+    column plus one column per persona, or None when score=False. AI noise is
+    drawn per row position, so scores don't depend on chunk_size.
+    """
+    noise = seeding.RowStream("ingest", "ai_mock")
+    offset = 0
+    for chunk in iter_resume_chunks(fp, chunk_size, fmt):
+        scores = None
+        if score:
+            from ai_mock import ai_mock_score_batch
+            from personas import score_personas_batch
+            scores = score_personas_batch(chunk)
+            scores.insert(0, "AI Model", ai_mock_score_batch(chunk, rng=noise.at(offset)))
+        offset += len(chunk)
+        if save:
+            from db import bulk_save_resumes
+            bulk_save_resumes(chunk)
+        yield chunk, scores
@@ -0,0 +1,218 @@
+# instrumentation.py
+"""
+Lightweight stage instrumentation: timing spans, counters and exporters.
+
+Entry points are wrapped with @timed, and hot paths can open `span(...)`
+blocks or call `count(...)`. While disabled (the default) each of these is a
+single flag check. Turn it on with INSTRUMENTATION=1 or enable(). Recorded data:
+- per-span call counts and latency histograms;
+- rows processed per stage;
+- named counters such as score-cache hits.
+
+Export it with write_prometheus (text exposition format) or snapshot(). With
+INSTRUMENTATION_LOG set, every finished span is also appended to a JSON-lines
+log.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float("inf"))
+
+_enabled = config.INSTRUMENTATION
+_lock = threading.Lock()
+_spans = {}        # name → {"count", "sum", "max", "buckets"}
+_counters = {}     # (name, labels) → value
+_log_path = config.INSTRUMENTATION_LOG or None
+
+
+def enable(log_path=None):
+    global _enabled, _log_path
+    _enabled = True
+    if log_path is not None:
+        _log_path = log_path
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def count(name, value=1, **labels):
+    """Add value to a counter, e.g. count("score_cache_lookups", result="hit")."""
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _record(name, seconds, rows):
+    with _lock:
+        s = _spans.get(name)
+        if s is None:
+            s = _spans[name] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS)}
+        s["count"] += 1
+        s["sum"] += seconds
+        s["max"] = max(s["max"], seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                s["buckets"][i] += 1
+                break
+        if rows:
+            key = ("rows_processed", (("stage", name),))
+            _counters[key] = _counters.get(key, 0) + rows
+    if _log_path:
+        line = json.dumps({"ts": time.time(), "span": name, "seconds": seconds, "rows": rows})
+        with _lock, open(_log_path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+class _Span:
+    __slots__ = ("rows",)
+
+    def __init__(self, rows):
+        self.rows = rows
+
+
+@contextmanager
+def span(name, rows=None):
+    """Time a block; set `.rows` on the yielded object to count rows processed."""
+    if not _enabled:
+        yield _Span(rows)
+        return
+    s = _Span(rows)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    finally:
+        _record(name, time.perf_counter() - t0, s.rows)
+
+
+def _len(x):
+    from personas import _n_rows
+    try:
+        return _n_rows(x)
+    except (TypeError, StopIteration):
+        return None
+
+
+def _row_counter(fn, rows):
+    """Turn timed()'s rows spec into a (args, kwargs, result) → row count callable, or None."""
+    if rows is None:
+        return None
+    if callable(rows):
+        return lambda args, kwargs, result: rows(*args, **kwargs)
+    if rows == "result":
+        return lambda args, kwargs, result: _len(result)
+    if rows == "arg":
+        rows = 0
+    if isinstance(rows, str):
+        params = list(inspect.signature(fn).parameters)
+        index = params.index(rows)
+        name = rows
+    else:
+        index, name = rows, None
+
+    def counter(args, kwargs, result):
+        if index < len(args):
+            return _len(args[index])
+        return _len(kwargs[name]) if name in kwargs else None
+    return counter
+
+
+def timed(name=None, rows=None):
+    """
+    Decorator recording a span per call. rows selects what to count as rows
+    processed: a positional index or parameter name (len() of that argument;
+    dicts of columns count their column length), "result" for the return
+    value, or a callable taking the call's arguments. "arg" is the first
+    argument; on methods, name the data parameter since index 0 is self.
+    """
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+        count_rows = _row_counter(fn, rows)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            result = fn(*args, **kwargs)
+            elapsed = time.perf_counter() - t0
+            _record(label, elapsed, count_rows(args, kwargs, result) if count_rows else None)
+            return result
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    """Copy of everything recorded so far: {"spans": {...}, "counters": [...]}."""
+    with _lock:
+        spans = {k: dict(v, buckets=list(v["buckets"])) for k, v in _spans.items()}
+        counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in _counters.items()]
+    return {"spans": spans, "counters": counters}
+
+
+def span_table():
+    """Per-span rows (name, calls, total/mean/max seconds) sorted by total time, for display."""
+    rows = [{"span": k, "calls": v["count"], "total_s": v["sum"], "mean_ms": 1e3 * v["sum"] / v["count"],
+             "max_ms": 1e3 * v["max"]} for k, v in snapshot()["spans"].items()]
+    return sorted(rows, key=lambda r: r["total_s"], reverse=True)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+
+def prometheus_text(prefix="rt"):
+    """Current metrics in the Prometheus text exposition format."""
+    snap = snapshot()
+    lines = [f"# HELP {prefix}_stage_seconds Time spent per instrumented stage.",
+             f"# TYPE {prefix}_stage_seconds histogram"]
+    for name, s in sorted(snap["spans"].items()):
+        cumulative = 0
+        for bound, n in zip(BUCKETS, s["buckets"]):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s["sum"]}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+    for c in sorted({c["name"] for c in snap["counters"]}):
+        lines.append(f"# TYPE {prefix}_{c}_total counter")
+        for entry in snap["counters"]:
+            if entry["name"] == c:
+                lines.append(f"{prefix}_{c}_total{_labels(sorted(entry['labels'].items()))} {entry['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, prefix="rt"):
+    """Atomically write prometheus_text() to path (for node_exporter's textfile collector)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(prometheus_text(prefix))
+    os.replace(tmp, path)
+
+
+def write_json(path):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(snapshot(), fh, indent=2)
@@ -0,0 +1,59 @@
+# matcher.py
+"""
+Shared keyword matchers for prestige/brand detection.
+
+Each keyword list is compiled once into a single case-insensitive regex and
+results are memoized per distinct string, so scoring a column of repeated
+school or employer names costs one regex search per unique value.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+IVY_LEAGUE = ("harvard", "yale", "princeton", "columbia", "brown",
+              "dartmouth", "upenn", "cornell")
+PRESTIGE_SCHOOLS = IVY_LEAGUE + ("stanford", "mit")
+FAANG = ("google", "amazon", "facebook", "meta", "apple", "microsoft", "netflix")
+
+_CACHE_SIZE = 65536
+
+
+class KeywordMatcher:
+    """Whole-word, case-insensitive test for any of `keywords` in a string."""
+
+    def __init__(self, keywords):
+        self.keywords = tuple(k.lower() for k in keywords)
+        alternation = "|".join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+        self._pattern = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+        self._match = lru_cache(maxsize=_CACHE_SIZE)(self._search)
+
+    def _search(self, text):
+        return self._pattern.search(text) is not None
+
+    def __call__(self, text):
+        if not isinstance(text, str):
+            return False
+        return self._match(text)
+
+    def match_many(self, values):
+        """Boolean array over a column of strings; missing values never match."""
+        codes, uniques = pd.factorize(pd.Series(values))
+        # Trailing False catches the -1 code factorize assigns to missing values.
+        hits = np.fromiter((self(u) for u in uniques), dtype=bool, count=len(uniques))
+        return np.append(hits, False)[codes]
+
+    def cache_info(self):
+        return self._match.cache_info()
+
+
+@lru_cache(maxsize=None)
+def keyword_matcher(keywords):
+    """Matcher for a keyword tuple; identical lists share one compiled instance."""
+    return KeywordMatcher(keywords)
+
+
+IVY = keyword_matcher(IVY_LEAGUE)
+PRESTIGE = keyword_matcher(PRESTIGE_SCHOOLS)
+BRAND = keyword_matcher(FAANG)
@@ -1,40 +1,245 @@
+import json
+
 import numpy as np
-from sklearn.isotonic import IsotonicRegression
 
-def reweight_by_group(resumes, labels, protected_fn):
+from fairness import encode_groups, select
+from instrumentation import timed
+
+@timed("mitigation.reweight_by_group", rows="arg")
+def reweight_by_group(resumes, labels, protected_fn=None, groups=None):
     """
     Simple reweighting: sample weights inversely proportional to group's positive rate.
+    Groups come from protected_fn (called once per resume) or are passed directly
+    as a column / DataFrame of protected attributes.
     returns: numpy array of normalized sample weights
     """
-    groups = {}
-    for r, lab in zip(resumes, labels):
-        g = protected_fn(r)
-        groups.setdefault(g, []).append(lab)
-    weights = []
-    for r, lab in zip(resumes, labels):
-        g = protected_fn(r)
-        grp = groups.get(g, [0])
-        sel_rate = np.mean(grp) if len(grp) > 0 else 0.5
-        w = 1.0 / max(0.01, sel_rate)
-        weights.append(w)
-    w = np.array(weights)
+    if groups is None:
+        groups = [protected_fn(r) for r in resumes]
+    codes, _ = encode_groups(groups)
+    labels = np.asarray(labels, dtype=float)
+    sel_rate = np.bincount(codes, weights=labels) / np.bincount(codes)
+    w = 1.0 / np.maximum(0.01, sel_rate)[codes]
     return w / np.mean(w)
 
+class Calibrator:
+    """
+    Monotone score calibration stored as breakpoints (x ascending, y = calibrated
+    value). Applying it is one np.interp over any number of scores, clipped to
+    the end values like IsotonicRegression(out_of_bounds='clip'). Breakpoints
+    round-trip through to_dict / from_dict, so a fitted calibrator can be saved
+    to the db and reused without refitting.
+    """
+
+    def __init__(self, x, y):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+
+    @classmethod
+    @timed("mitigation.Calibrator.fit", rows="scores")
+    def fit(cls, scores, labels, sample_weight=None):
+        from sklearn.isotonic import IsotonicRegression
+        ir = IsotonicRegression(out_of_bounds='clip')
+        ir.fit(np.asarray(scores, dtype=float).reshape(-1), labels, sample_weight=sample_weight)
+        return cls(ir.X_thresholds_, ir.y_thresholds_)
+
+    @timed("mitigation.Calibrator.transform", rows="scores")
+    def transform(self, scores):
+        return np.interp(np.asarray(scores, dtype=float).reshape(-1), self.x, self.y)
+
+    __call__ = transform
+
+    def to_dict(self):
+        return {"x": self.x.tolist(), "y": self.y.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["x"], d["y"])
+
+    def __len__(self):
+        return len(self.x)
+
 def isotonic_postprocess(scores, labels):
-    ir = IsotonicRegression(out_of_bounds='clip')
-    ir.fit(scores, labels)
-    def transform(new_scores):
-        return ir.transform(np.array(new_scores).reshape(-1))
-    return transform
-
-def apply_reweighing(ai_scores, persona_scores):
-    """
-    A placeholder function to resolve the AttributeError.
-    In a real-world scenario, this function would contain the logic
-    for fairlearn or AIF360-style mitigation, adjusting scores
-    based on a protected attribute. This example simply returns
-    the average of the two score sets to allow the app to run.
-    """
-    # Placeholder mitigation logic: average the two scores
-    mitigated_scores = (ai_scores + persona_scores) / 2
-    return mitigated_scores
+    """Fitted Calibrator; still callable on new scores like the old closure."""
+    return Calibrator.fit(scores, labels)
+
+# name → Calibrator, shared by every caller (and Streamlit rerun) in this process
+_calibrators = {}
+
+@timed("mitigation.fit_calibrators", rows="arg")
+def fit_calibrators(trials, score_col="persona_score", label_col="correct", by="persona", save=True):
+    """
+    Fit one Calibrator per scorer/persona from a trials DataFrame and, with
+    save=True, store each in the db and the in-memory cache.
+    returns: dict name → Calibrator
+    """
+    fitted = {}
+    for name, grp in trials.groupby(by, sort=True):
+        fitted[name] = Calibrator.fit(grp[score_col].to_numpy(), grp[label_col].to_numpy())
+        if save:
+            save_calibrator(name, fitted[name])
+    return fitted
+
+def save_calibrator(name, calibrator):
+    from db import save_calibration
+    save_calibration(name, calibrator.to_dict())
+    _calibrators[name] = calibrator
+
+def get_calibrator(name):
+    """Cached calibrator for name, loaded from the db on first use; None if never fitted."""
+    if name not in _calibrators:
+        from db import load_calibration
+        d = load_calibration(name)
+        if d is None:
+            return None
+        _calibrators[name] = Calibrator.from_dict(d)
+    return _calibrators[name]
+
+def calibrate(name, scores):
+    """Apply the stored calibrator for name to a score array."""
+    calibrator = get_calibrator(name)
+    if calibrator is None:
+        raise KeyError(f"No calibrator stored for {name!r}")
+    return calibrator(scores)
+
+@timed("mitigation.reweighing", rows="arg")
+def reweighing(groups, labels):
+    """
+    Kamiran–Calders reweighing: weight each (group, label) cell by
+    P(group)·P(label) / P(group, label), so that labels are independent of
+    group under the weighted data. groups is a column or DataFrame of
+    protected attributes.
+    returns: numpy array of sample weights (mean 1)
+    """
+    codes, cells = encode_groups(groups)
+    labels = np.asarray(labels).astype(bool)
+    k = len(cells)
+    joint = np.bincount(codes * 2 + labels, minlength=2 * k).reshape(k, 2)
+    n = joint.sum()
+    expected = np.outer(joint.sum(axis=1), joint.sum(axis=0)) / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cell_w = np.where(joint > 0, expected / joint, 0.0)
+    return cell_w[codes, labels.astype(int)]
+
+CONSTRAINTS = ("demographic_parity", "equal_opportunity")
+
+def _group_key(values):
+    return tuple(str(v) for v in values)
+
+def _sorted_thresholds(scores, codes, k, rate):
+    """
+    Per-group thresholds selecting round(rate * group size) rows: one lexsort by
+    (group, score desc), then each threshold is read off at its group's offset.
+    Thresholds sit halfway between the last selected and first rejected score;
+    groups with no rows get NaN.
+    """
+    order = np.lexsort((-scores, codes))
+    s = scores[order]
+    counts = np.bincount(codes, minlength=k)
+    starts = np.cumsum(counts) - counts
+    take = np.rint(rate * counts).astype(np.int64)
+    last = s[np.clip(starts + take - 1, 0, max(len(s) - 1, 0))] if len(s) else np.zeros(k)
+    first_out = s[np.clip(starts + take, 0, max(len(s) - 1, 0))] if len(s) else np.zeros(k)
+    thr = np.where(take < counts, (last + first_out) / 2, -np.inf)
+    thr = np.where(take > 0, thr, np.inf)
+    return np.where(counts > 0, thr, np.nan)
+
+class ThresholdMitigator:
+    """
+    Post-processing mitigation with one decision threshold per protected group.
+
+    demographic_parity equalizes selection rates; equal_opportunity equalizes
+    true-positive rates (needs labels). The common target rate defaults to the
+    overall rate at base_threshold (the median score when None). Fitting is one
+    O(n log n) sort and leaves the constructor arguments alone: the values it
+    used are stored as base_threshold_ and target_, so refitting on new scores
+    recomputes them. The fitted mitigator is plain JSON (to_dict / from_dict),
+    and groups not seen during fit fall back to base_threshold_.
+    """
+
+    def __init__(self, constraint="demographic_parity", target=None, base_threshold=None):
+        if constraint not in CONSTRAINTS:
+            raise ValueError(f"constraint must be one of {CONSTRAINTS}, got {constraint!r}")
+        self.constraint = constraint
+        self.target = target
+        self.base_threshold = base_threshold
+        self.target_ = None
+        self.base_threshold_ = None
+        self.attributes = []
+        self.thresholds = {}
+
+    @timed("mitigation.ThresholdMitigator.fit", rows="scores")
+    def fit(self, scores, groups, labels=None):
+        scores = np.asarray(scores, dtype=float)
+        codes, cells = encode_groups(groups)
+        base = float(np.median(scores)) if self.base_threshold is None else self.base_threshold
+        if self.constraint == "equal_opportunity":
+            if labels is None:
+                raise ValueError("equal_opportunity needs labels")
+            pos = np.asarray(labels).astype(bool)
+            rate = self.target if self.target is not None else float(np.mean(select(scores[pos], base)))
+            thr = _sorted_thresholds(scores[pos], codes[pos], len(cells), rate)
+        else:
+            rate = self.target if self.target is not None else float(np.mean(select(scores, base)))
+            thr = _sorted_thresholds(scores, codes, len(cells), rate)
+        # Groups with no (positive) rows to fit on fall back to the base threshold
+        thr = np.where(np.isnan(thr), base, thr)
+        self.base_threshold_ = base
+        self.target_ = rate
+        self.attributes = list(cells.columns)
+        self.thresholds = {_group_key(row): float(t)
+                           for row, t in zip(cells.itertuples(index=False, name=None), thr)}
+        return self
+
+    def group_thresholds(self, groups):
+        """Threshold per row, looked up once per distinct group."""
+        codes, cells = encode_groups(groups)
+        per_cell = np.array([self.thresholds.get(_group_key(row), self.base_threshold_)
+                             for row in cells.itertuples(index=False, name=None)], dtype=float)
+        return per_cell[codes]
+
+    @timed("mitigation.ThresholdMitigator.predict", rows="scores")
+    def predict(self, scores, groups):
+        """Mitigated selections (bool array): fairness.select at each row's group threshold."""
+        return select(scores, self.group_thresholds(groups))
+
+    @timed("mitigation.ThresholdMitigator.adjust", rows="scores")
+    def adjust(self, scores, groups):
+        """
+        Scores shifted per group so that a single cutoff at base_threshold_
+        reproduces predict(); infinite thresholds (select none / all) clip to the
+        score range.
+        """
+        scores = np.asarray(scores, dtype=float)
+        thr = self.group_thresholds(groups)
+        thr = np.clip(thr, scores.min() - 1, scores.max() + 1) if len(scores) else thr
+        return scores + (self.base_threshold_ - thr)
+
+    def to_dict(self):
+        return {
+            "constraint": self.constraint,
+            "target": self.target,
+            "base_threshold": self.base_threshold,
+            "target_": self.target_,
+            "base_threshold_": self.base_threshold_,
+            "attributes": self.attributes,
+            "thresholds": [{"group": list(k), "threshold": t} for k, t in self.thresholds.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        m = cls(d["constraint"], d["target"], d["base_threshold"])
+        # dicts saved before fitted values were kept apart hold them in target / base_threshold
+        m.target_ = d.get("target_", d["target"])
+        m.base_threshold_ = d.get("base_threshold_", d["base_threshold"])
+        m.attributes = list(d["attributes"])
+        m.thresholds = {tuple(t["group"]): float(t["threshold"]) for t in d["thresholds"]}
+        return m
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
@@ -2,6 +2,10 @@
 import uuid
 from typing import Dict, Any
 
+import numpy as np
+
+SKILL_POOL = ["python","sql","java","react","nlp","computer vision","ml","docker","kubernetes","aws","data analysis"]
+
 def make_uid():
     return str(uuid.uuid4())
 
@@ -24,3 +28,242 @@ def normalize_resume(resume: Dict[str, Any]) -> Dict[str, Any]:
 def _compute_gap_years(jobs):
     # placeholder: for prototype return 0
     return 0
+
+
+# -----------------------------
+# Columnar resume table
+# -----------------------------
+class Vocab:
+    """Interned vocabulary mapping values to small-int codes (-1 = missing)."""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.index = {}
+        for v in values:
+            self.intern(v)
+
+    def intern(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.index[value] = code
+            self.values.append(value)
+        return code
+
+    def encode(self, values, dtype=np.int32):
+        # None and NaN (pandas' missing marker) both encode as -1
+        return np.array([-1 if v is None or v != v else self.intern(v) for v in values], dtype=dtype)
+
+    def decode(self, codes):
+        return [None if c < 0 else self.values[c] for c in np.asarray(codes).tolist()]
+
+    def __len__(self):
+        return len(self.values)
+
+
+# Dictionary-encoded columns and where they live in the nested resume dict.
+EDUCATION_FIELDS = ("school", "degree", "year")
+JOB_FIELDS = ("employer", "title", "start", "end")
+CATEGORICAL_FIELDS = ("name", "gender") + EDUCATION_FIELDS + JOB_FIELDS
+
+# Flat (CSV-style) column names that personas read, served from the coded columns.
+_ALIASES = {"education_school": "school", "jobs_employer": "employer"}
+
+
+class ResumeTable:
+    """
+    Struct-of-arrays resume storage.
+
+    Categorical fields are int32 codes (int8 for gender) into a per-field Vocab,
+    skills are a uint64 bitmask over the `skill` vocab (seeded with SKILL_POOL),
+    gap years are int8.
+    Holds one education and one job entry per resume, which is what the generator
+    and CSV imports produce. to_dicts() rebuilds the normalize_resume form; skills
+    come back in vocabulary order.
+    """
+
+    def __init__(self, codes, skills, gap_years, vocab, uid=None):
+        self.codes = codes
+        self.skills = skills
+        self.gap_years = gap_years
+        self.vocab = vocab
+        self.uid = uid
+
+    @staticmethod
+    def empty_vocab():
+        vocab = {f: Vocab() for f in CATEGORICAL_FIELDS}
+        vocab["gender"] = Vocab(["unknown", "male", "female"])
+        vocab["skill"] = Vocab(SKILL_POOL)
+        return vocab
+
+    @classmethod
+    def from_dicts(cls, resumes, vocab=None):
+        vocab = cls.empty_vocab() if vocab is None else vocab
+        cols = {f: [] for f in CATEGORICAL_FIELDS}
+        masks, gaps, uids = [], [], []
+        for r in resumes:
+            edu = r.get("education") or [{}]
+            jobs = r.get("jobs") or [{}]
+            if len(edu) > 1 or len(jobs) > 1:
+                raise ValueError("ResumeTable holds a single education and job entry per resume")
+            cols["name"].append(r.get("name"))
+            cols["gender"].append(r.get("gender"))
+            for f in EDUCATION_FIELDS:
+                cols[f].append(edu[0].get(f))
+            for f in JOB_FIELDS:
+                cols[f].append(jobs[0].get(f))
+            if cols["school"][-1] is None:
+                cols["school"][-1] = r.get("education_school")
+            if cols["employer"][-1] is None:
+                cols["employer"][-1] = r.get("jobs_employer")
+            skills = r.get("skills") or []
+            if isinstance(skills, str):
+                # CSV exports keep skills as one comma-separated cell
+                skills = [s.strip() for s in skills.split(",") if s.strip()]
+            mask = 0
+            for s in skills:
+                mask |= 1 << vocab["skill"].intern(s)
+            masks.append(mask)
+            gaps.append(r.get("gap_years", 0))
+            uids.append(r.get("uid"))
+        if len(vocab["skill"]) > 64:
+            raise ValueError("ResumeTable supports at most 64 distinct skills")
+        codes = {f: vocab[f].encode(v, np.int8 if f == "gender" else np.int32) for f, v in cols.items()}
+        return cls(codes, np.array(masks, dtype=np.uint64), np.array(gaps, dtype=np.int8),
+                   vocab, uid=np.array(uids, dtype=object))
+
+    @classmethod
+    def from_frame(cls, df, vocab=None):
+        """
+        Columnar counterpart of from_dicts for flat (CSV-style) frames: each column
+        is factorized once and only its distinct values touch the vocab. Missing
+        uid, gender and gap_years get normalize_resume's defaults.
+        """
+        import pandas as pd
+        vocab = cls.empty_vocab() if vocab is None else vocab
+        n = len(df)
+        sources = {f: f for f in CATEGORICAL_FIELDS}
+        sources.update({v: k for k, v in _ALIASES.items()})
+
+        codes = {}
+        for field in CATEGORICAL_FIELDS:
+            col = sources[field] if sources[field] in df else field
+            dtype = np.int8 if field == "gender" else np.int32
+            if col not in df:
+                codes[field] = np.full(n, -1, dtype=dtype)
+                continue
+            fcodes, uniques = pd.factorize(df[col])
+            missing = vocab[field].intern("unknown") if field == "gender" else -1
+            remap = np.array([vocab[field].intern(u) for u in uniques] + [missing], dtype=dtype)
+            codes[field] = remap[fcodes]
+
+        skills = np.zeros(n, dtype=np.uint64)
+        if "skills" in df:
+            fcodes, uniques = pd.factorize(df["skills"])
+            masks = []
+            for u in uniques:
+                mask = 0
+                for s in str(u).split(","):
+                    if s.strip():
+                        mask |= 1 << vocab["skill"].intern(s.strip())
+                masks.append(mask)
+            if len(vocab["skill"]) > 64:
+                raise ValueError("ResumeTable supports at most 64 distinct skills")
+            skills = np.array(masks + [0], dtype=np.uint64)[fcodes]
+
+        gap_years = np.zeros(n, dtype=np.int8)
+        if "gap_years" in df:
+            gap_years = pd.to_numeric(df["gap_years"], errors="coerce").fillna(0).to_numpy(dtype=np.int8)
+
+        if "uid" in df:
+            uid = np.array([make_uid() if pd.isna(u) else str(u) for u in df["uid"].tolist()], dtype=object)
+        else:
+            uid = np.array([make_uid() for _ in range(n)], dtype=object)
+        return cls(codes, skills, gap_years, vocab, uid=uid)
+
+    def to_dicts(self):
+        values = {f: self.vocab[f].decode(c) for f, c in self.codes.items()}
+        skill_names = self.vocab["skill"].values
+        rows = []
+        for i in range(len(self)):
+            mask = int(self.skills[i])
+            resume = {
+                "name": values["name"][i],
+                "education": [{f: values[f][i] for f in EDUCATION_FIELDS}] if values["school"][i] is not None else [],
+                "jobs": [{f: values[f][i] for f in JOB_FIELDS}] if values["employer"][i] is not None else [],
+                "skills": [s for b, s in enumerate(skill_names) if mask >> b & 1],
+                "gender": values["gender"][i],
+                "gap_years": int(self.gap_years[i]),
+            }
+            if self.uid is not None:
+                resume["uid"] = self.uid[i]
+            rows.append(normalize_resume(resume))
+        return rows
+
+    def column(self, field):
+        """Categorical view (pandas) of a coded field."""
+        import pandas as pd
+        return pd.Categorical.from_codes(self.codes[field], self.vocab[field].values)
+
+    def to_frame(self):
+        import pandas as pd
+        data = {f: self.column(f) for f in CATEGORICAL_FIELDS}
+        data["skills"] = self.skills
+        data["gap_years"] = self.gap_years
+        if self.uid is not None:
+            data["uid"] = self.uid
+        return pd.DataFrame(data)
+
+    def take(self, idx):
+        return ResumeTable({f: c[idx] for f, c in self.codes.items()}, self.skills[idx],
+                           self.gap_years[idx], self.vocab,
+                           uid=None if self.uid is None else self.uid[idx])
+
+    @classmethod
+    def concat(cls, tables):
+        """Concatenate tables, remapping codes when their vocabularies differ."""
+        tables = list(tables)
+        vocab = tables[0].vocab
+        codes = {f: [] for f in CATEGORICAL_FIELDS}
+        skills = []
+        for t in tables:
+            for f in CATEGORICAL_FIELDS:
+                c = t.codes[f]
+                if t.vocab[f] is not vocab[f]:
+                    remap = np.array([vocab[f].intern(v) for v in t.vocab[f].values] + [-1], dtype=c.dtype)
+                    c = remap[c]
+                codes[f].append(c)
+            s = t.skills
+            if t.vocab["skill"] is not vocab["skill"]:
+                remapped = np.zeros_like(s)
+                for b, v in enumerate(t.vocab["skill"].values):
+                    nb = vocab["skill"].intern(v)
+                    remapped |= ((s >> np.uint64(b)) & np.uint64(1)) << np.uint64(nb)
+                s = remapped
+            skills.append(s)
+        uid = None
+        if all(t.uid is not None for t in tables):
+            uid = np.concatenate([t.uid for t in tables])
+        return cls({f: np.concatenate(c) for f, c in codes.items()}, np.concatenate(skills),
+                   np.concatenate([t.gap_years for t in tables]), vocab, uid=uid)
+
+    def nbytes(self):
+        n = sum(c.nbytes for c in self.codes.values()) + self.skills.nbytes + self.gap_years.nbytes
+        return n if self.uid is None else n + self.uid.nbytes
+
+    def __len__(self):
+        return len(self.gap_years)
+
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            return self.take(key)
+        key = _ALIASES.get(key, key)
+        if key in self.codes:
+            return self.column(key)
+        if key in ("skills", "gap_years", "uid"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        key = _ALIASES.get(key, key)
+        return key in self.codes or key in ("skills", "gap_years") or (key == "uid" and self.uid is not None)
@@ -1,49 +1,22 @@
 # personas.py
 
-# Each persona is a scoring function: takes resume dict → outputs numeric score
-
-def ivy_only_bias(resume):
-    """Favor Ivy League schools, penalize others."""
-    school = resume.get("education_school", "").lower()
-    ivy_league = ["harvard", "yale", "princeton", "columbia", "brown",
-                  "dartmouth", "upenn", "cornell"]
-    if any(ivy in school for ivy in ivy_league):
-        return 0.9
-    return 0.5
-
-def gap_year_penalty(resume):
-    """Penalize candidates with long gap years."""
-    gap = resume.get("gap_years", 0)
-    return max(0.9 - 0.1 * gap, 0.1)
-
-def brand_snob_bias(resume):
-    """Favor FAANG employers."""
-    employers = str(resume.get("jobs_employer", "")).lower()
-    faang = ["google", "amazon", "facebook", "meta", "apple", "microsoft", "netflix"]
-    if any(b in employers for b in faang):
-        return 0.9
-    return 0.5
-
-def gender_penalty_bias(resume):
-    """Research-only persona: penalize female resumes."""
-    gender = resume.get("gender", "").lower()
-    if gender == "female":
-        return 0.4
-    return 0.8
-
-# Dictionary mapping persona names → function
-bias_personas = {
-    "Ivy-only Bias": ivy_only_bias,
-    "Gap-year Penalty": gap_year_penalty,
-    "Brand-snob Bias": brand_snob_bias,
-    "Gender Penalty": gender_penalty_bias,
-}
-# personas.py
-
 """
 Each persona is a scoring function: takes a resume dict → outputs numeric score (0–1).
+
+Personas are declared as rules (MatchRule / LinearRule) and compiled into both a
+scalar callable and a batch evaluator that scores a whole table at once.
 """
 
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from matcher import IVY_LEAGUE, FAANG, keyword_matcher
+from instrumentation import timed
+
+
 def _base_score(resume):
     """
     Provide a baseline score for any resume.
@@ -52,7 +25,7 @@ def _base_score(resume):
     """
     # Start with a neutral score around 50
     score = 50.0
-    
+
     # Simple heuristic: add minor boosts if resume has some info
     if resume.get("education"):
         score += 5
@@ -60,7 +33,7 @@ def _base_score(resume):
         score += 5
     if resume.get("skills"):
         score += 5
-    
+
     return score
 
 
@@ -71,38 +44,115 @@ def _clip(val, low=0, high=100):
     return max(low, min(high, val))
 
 
-def ivy_only_bias(resume):
-    """Favor Ivy League schools, penalize others."""
-    school = resume.get("education_school", "").lower()
-    ivy_league = ["harvard", "yale", "princeton", "columbia", "brown",
-                  "dartmouth", "upenn", "cornell"]
-    if any(ivy in school for ivy in ivy_league):
-        return 0.9
-    return 0.5
-
-
-def gap_year_penalty(resume):
-    """Penalize candidates with long gap years."""
-    gap = resume.get("gap_years", 0)
-    return max(0.9 - 0.1 * gap, 0.1)
-
-
-def brand_snob_bias(resume):
-    """Favor FAANG employers."""
-    employers = str(resume.get("jobs_employer", "")).lower()
-    faang = ["google", "amazon", "facebook", "meta", "apple", "microsoft", "netflix"]
-    if any(b in employers for b in faang):
-        return 0.9
-    return 0.5
-
-
-def gender_penalty_bias(resume):
-    """(For research) Penalize female resumes artificially."""
-    gender = resume.get("gender", "").lower()
-    if gender == "female":
-        return 0.4
-    return 0.8
+# -----------------------------
+# Declarative rules
+# -----------------------------
+@dataclass(frozen=True)
+class MatchRule:
+    """Score `hit` if the attribute matches any entry of `match`, else `miss`.
+    Matching is a case-insensitive whole-word keyword test, or equality when exact=True."""
+    attribute: str
+    match: Tuple[str, ...]
+    hit: float
+    miss: float
+    exact: bool = False
+    doc: str = ""
+
+
+@dataclass(frozen=True)
+class LinearRule:
+    """Score `base + slope * attribute`, clamped to [low, high] (None = unbounded)."""
+    attribute: str
+    base: float
+    slope: float
+    clamp: Tuple[Optional[float], Optional[float]] = (None, None)
+    default: float = 0
+    doc: str = ""
+
+
+def _clamp_scalar(val, clamp):
+    low, high = clamp
+    if low is not None:
+        val = max(val, low)
+    if high is not None:
+        val = min(val, high)
+    return val
+
+
+def _n_rows(table):
+    return len(next(iter(table.values()))) if isinstance(table, dict) else len(table)
+
+
+def compile_scalar(rule):
+    """Compile a rule into a resume dict → score callable."""
+    if isinstance(rule, MatchRule):
+        keywords = tuple(k.lower() for k in rule.match)
+        if rule.exact:
+            def fn(resume):
+                value = str(resume.get(rule.attribute, "")).lower()
+                return rule.hit if value in keywords else rule.miss
+        else:
+            matcher = keyword_matcher(rule.match)
+
+            def fn(resume):
+                return rule.hit if matcher(str(resume.get(rule.attribute, ""))) else rule.miss
+    elif isinstance(rule, LinearRule):
+        def fn(resume):
+            value = resume.get(rule.attribute, rule.default)
+            return _clamp_scalar(rule.base + rule.slope * value, rule.clamp)
+    else:
+        raise TypeError(f"Unknown persona rule: {rule!r}")
+    fn.__doc__ = rule.doc
+    fn.rule = rule
+    return fn
+
+
+def compile_batch(rule):
+    """Compile a rule into a DataFrame / dict of columns → score array evaluator."""
+    if isinstance(rule, MatchRule):
+        keywords = tuple(k.lower() for k in rule.match)
+        matcher = keyword_matcher(rule.match)
+
+        def fn(table):
+            col = table[rule.attribute] if rule.attribute in table else None
+            n = _n_rows(table)
+            if col is None:
+                return np.full(n, rule.miss, dtype=float)
+            if rule.exact:
+                hits = pd.Series(col).astype(str).str.lower().isin(keywords).to_numpy()
+            else:
+                hits = matcher.match_many(col)
+            return np.where(hits, rule.hit, rule.miss)
+    elif isinstance(rule, LinearRule):
+        def fn(table):
+            col = table[rule.attribute] if rule.attribute in table else None
+            n = _n_rows(table)
+            values = np.full(n, rule.default, dtype=float) if col is None else np.asarray(col, dtype=float)
+            low, high = rule.clamp
+            return np.clip(rule.base + rule.slope * values, low, high)
+    else:
+        raise TypeError(f"Unknown persona rule: {rule!r}")
+    fn.__doc__ = rule.doc
+    fn.rule = rule
+    return fn
+
+
+# Dictionary mapping persona names → rule
+persona_rules = {
+    "Ivy-only Bias": MatchRule("education_school", IVY_LEAGUE, hit=0.9, miss=0.5,
+                               doc="Favor Ivy League schools, penalize others."),
+    "Gap-year Penalty": LinearRule("gap_years", base=0.9, slope=-0.1, clamp=(0.1, None),
+                                   doc="Penalize candidates with long gap years."),
+    "Brand-snob Bias": MatchRule("jobs_employer", FAANG, hit=0.9, miss=0.5,
+                                 doc="Favor FAANG employers."),
+    "Gender Penalty": MatchRule("gender", ("female",), hit=0.4, miss=0.8, exact=True,
+                                doc="(For research) Penalize female resumes artificially."),
+}
 
+ivy_only_bias = compile_scalar(persona_rules["Ivy-only Bias"])
+gap_year_penalty = compile_scalar(persona_rules["Gap-year Penalty"])
+brand_snob_bias = compile_scalar(persona_rules["Brand-snob Bias"])
+gender_penalty_bias = compile_scalar(persona_rules["Gender Penalty"])
 
 # Dictionary mapping persona names → function
 bias_personas = {
@@ -111,3 +161,15 @@ bias_personas = {
     "Brand-snob Bias": brand_snob_bias,
     "Gender Penalty": gender_penalty_bias,
 }
+
+# Dictionary mapping persona names → batch evaluator
+batch_personas = {name: timed(f"personas.{name}.batch", rows="arg")(compile_batch(rule))
+                  for name, rule in persona_rules.items()}
+
+
+@timed("personas.score_personas_batch", rows="arg")
+def score_personas_batch(table, personas=None):
+    """Score every persona over a table; returns a DataFrame with one column per persona."""
+    personas = batch_personas if personas is None else personas
+    return pd.DataFrame({name: fn(table) for name, fn in personas.items()},
+                        index=table.index if isinstance(table, pd.DataFrame) else None)
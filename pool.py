@@ -0,0 +1,123 @@
+# pool.py
+"""
+Pre-scored candidate pool for the interactive game.
+
+Resumes are scored in batches against the AI model and every persona ahead of
+time; handing out a trial is a deque pop. When the pool drops below its refill
+mark a background thread scores the next batch, so the render path never calls
+a model and what the player sees is exactly what gets recorded on submit.
+"""
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+import seeding
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One game round: a resume, its AI score and one persona's score in display order."""
+    resume: Dict[str, Any]
+    ai_score: float
+    persona: str
+    persona_score: float
+    options: Tuple[Tuple[str, float], ...]          # (source, score) in the order shown
+    persona_scores: Dict[str, float] = field(default_factory=dict)  # every persona, for audits
+
+    def trial(self, choice, explanation=""):
+        """Trial record in the shape app.py stores and db.save_run_result expects."""
+        return {
+            "resume": self.resume,
+            "ai_score": self.ai_score,
+            "persona_score": self.persona_score,
+            "persona": self.persona,
+            "choice": choice,
+            "correct": 1 if self.options[choice - 1][0] == self.persona else 0,
+            "explanation": explanation,
+        }
+
+
+class CandidatePool:
+    """
+    Queue of pre-scored Candidates drawn from `resumes` (a list of resume dicts).
+    next() is O(1); below refill_at a single background refill tops the queue
+    back up to size. personas maps name → batch scorer (personas.batch_personas).
+    backend: a scoring.ScoringBackend for the AI scores (e.g. a cache.CachedBackend
+    around an HTTPBackend); None scores in-process with ai_mock_score_batch.
+    """
+
+    def __init__(self, resumes, personas=None, size=256, refill_at=64, seed=None, backend=None):
+        if not resumes:
+            raise ValueError("CandidatePool needs at least one resume")
+        if personas is None:
+            from personas import batch_personas
+            personas = batch_personas
+        self.resumes = list(resumes)
+        self.personas = dict(personas)
+        self.size = size
+        self.refill_at = refill_at
+        self.backend = backend
+        self._rng = seeding.stream("pool", seed=seed)
+        self._queue = deque()
+        self._fill_lock = threading.Lock()
+        self._refill = None
+
+    def _score_batch(self, n):
+        from ai_mock import ai_mock_score_batch
+        from personas import score_personas_batch
+        rows = [self.resumes[i] for i in self._rng.integers(0, len(self.resumes), n)]
+        table = pd.DataFrame(rows)
+        if self.backend is None:
+            ai = ai_mock_score_batch(table, rng=self._rng)
+        else:
+            ai = np.asarray(self.backend.score_many(rows), dtype=float)
+        scores = score_personas_batch(table, self.personas)
+        names = list(scores.columns)
+        picks = self._rng.integers(0, len(names), n)
+        swaps = self._rng.random(n) < 0.5
+        persona_values = scores.to_numpy(dtype=float)
+        batch = []
+        for i, row in enumerate(rows):
+            name = names[picks[i]]
+            options = (("AI Model", float(ai[i])), (name, float(persona_values[i, picks[i]])))
+            batch.append(Candidate(
+                resume=row,
+                ai_score=float(ai[i]),
+                persona=name,
+                persona_score=float(persona_values[i, picks[i]]),
+                options=options[::-1] if swaps[i] else options,
+                persona_scores=dict(zip(names, persona_values[i].tolist())),
+            ))
+        return batch
+
+    def fill(self):
+        """Score enough candidates to bring the queue back to `size`."""
+        with self._fill_lock:
+            missing = self.size - len(self._queue)
+            if missing > 0:
+                self._queue.extend(self._score_batch(missing))
+
+    def _refill_in_background(self):
+        if self._refill is not None and self._refill.is_alive():
+            return
+        self._refill = threading.Thread(target=self.fill, name="candidate-pool-refill", daemon=True)
+        self._refill.start()
+
+    def next(self):
+        """Next pre-scored Candidate; fills synchronously only when the queue is empty."""
+        while True:
+            try:
+                candidate = self._queue.popleft()
+                break
+            except IndexError:
+                self.fill()
+        if len(self._queue) < self.refill_at:
+            self._refill_in_background()
+        return candidate
+
+    def __len__(self):
+        return len(self._queue)
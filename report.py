@@ -1,69 +1,39 @@
 import datetime
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 from analytics import kl_divergence, js_divergence, earth_movers_distance
+from instrumentation import timed
 
-def generate_report(df: pd.DataFrame, ai_scores, persona_scores) -> str:
-    """
-    Generate a compliance-ready HTML bias audit report.
-    Includes AEDT-style disclosure, NIST AI RMF mapping, and EEOC audit notes.
-    """
-
-    n = len(df)
-    correct = df["correct"].sum()
-    accuracy = correct / n if n > 0 else 0
-
-    # Distribution metrics
-    kl = kl_divergence(ai_scores, persona_scores)
-    js = js_divergence(ai_scores, persona_scores)
-    emd = earth_movers_distance(ai_scores, persona_scores)
-
-    now = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
-
-    # Generate historical trend data
-    historical_accuracies = []
-    current_correct = 0
-    for i in range(len(df)):
-        if df.iloc[i]['correct'] == 1:
-            current_correct += 1
-        historical_accuracies.append(current_correct / (i + 1))
+# Fixed budgets so report size and render time don't grow with the trial count
+TREND_POINTS = 500
+HISTOGRAM_BINS = 10
+SCORE_RANGE = (0, 100)
 
-    # Format historical data for HTML
-    trend_labels = [f"Trial {i+1}" for i in range(len(df))]
-    trend_data = [f"{acc:.4f}" for acc in historical_accuracies]
-    trend_datasets = f'{{ label: "User Accuracy", data: [{",".join(trend_data)}], borderColor: "#3498db", fill: false }}'
-
-    # Determine Bias Scorecard value based on KL Divergence
-    bias_scorecard = ""
-    bias_color = ""
-    if kl < 0.1:
-        bias_scorecard = "Minimal Bias"
-        bias_color = "#28a745" # Green
-    elif kl < 0.5:
-        bias_scorecard = "Medium Bias"
-        bias_color = "#ffc107" # Yellow
-    else:
-        bias_scorecard = "High Bias"
-        bias_color = "#dc3545" # Red
+_BIAS_COLORS = {
+    "Minimal Bias": "#28a745",  # Green
+    "Medium Bias": "#ffc107",   # Yellow
+    "High Bias": "#dc3545",     # Red
+}
 
-    # Prepare data for score distribution histogram
-    ai_scores_str = ",".join(map(str, ai_scores))
-    persona_scores_str = ",".join(map(str, persona_scores))
+_RATE_COLUMNS = ("n", "selected", "selection_rate", "impact_ratio", "tpr", "fpr")
 
-    html = f"""
+REPORT_TEMPLATE = """
     <html>
     <head>
         <title>AI Fairness Audit Report</title>
         <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
         <style>
-            body {{ font-family: 'Arial', sans-serif; margin: 2em; line-height: 1.6; color: #444; }}
-            h1, h2, h3 {{ color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 0.3em; }}
-            table {{ border-collapse: collapse; width: 100%; margin: 1em 0; border: 1px solid #ddd; }}
-            th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
-            th {{ background-color: #f8f9fa; color: #333; font-weight: bold; }}
-            .section {{ margin-bottom: 2.5em; background-color: #fefefe; padding: 1.5em; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }}
-            ul {{ padding-left: 20px; }}
-            li {{ margin-bottom: 0.5em; }}
-            .bias-scorecard {{
+            body { font-family: 'Arial', sans-serif; margin: 2em; line-height: 1.6; color: #444; }
+            h1, h2, h3 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 0.3em; }
+            table { border-collapse: collapse; width: 100%; margin: 1em 0; border: 1px solid #ddd; }
+            th, td { border: 1px solid #ddd; padding: 12px; text-align: left; }
+            th { background-color: #f8f9fa; color: #333; font-weight: bold; }
+            .section { margin-bottom: 2.5em; background-color: #fefefe; padding: 1.5em; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.05); }
+            ul { padding-left: 20px; }
+            li { margin-bottom: 0.5em; }
+            .bias-scorecard {
                 font-size: 1.5em;
                 font-weight: bold;
                 padding: 0.5em 1em;
@@ -71,27 +41,27 @@ def generate_report(df: pd.DataFrame, ai_scores, persona_scores) -> str:
                 color: white;
                 text-align: center;
                 margin-top: 1em;
-                background-color: {bias_color};
-            }}
+                background-color: {{ bias_color }};
+            }
         </style>
     </head>
     <body>
         <h1>📄 AI Fairness Audit Report</h1>
         <p>This report provides a comprehensive analysis of the bias present in an AI hiring model, comparing its decisions to those of a known biased human judge. The findings are presented to be easily understood by all stakeholders, from technical teams to legal and human resources personnel.</p>
-        
+
         <div class="section">
             <h2>Summary of Key Findings</h2>
             <table>
                 <tr><th>Metric</th><th>Result</th><th>Explanation</th></tr>
-                <tr><td>Date of Report</td><td>{now}</td><td>The time and date the audit was performed.</td></tr>
-                <tr><td>Number of Trials</td><td>{n}</td><td>The total number of resumes evaluated in the test.</td></tr>
-                <tr><td>User Accuracy</td><td>{accuracy:.2%} ({correct}/{n})</td><td>The percentage of times a human user correctly identified the biased judge's score. An accuracy near 50% suggests the AI's bias is indistinguishable from the human's.</td></tr>
+                <tr><td>Date of Report</td><td>{{ now }}</td><td>The time and date the audit was performed.</td></tr>
+                <tr><td>Number of Trials</td><td>{{ n }}</td><td>The total number of resumes evaluated in the test.</td></tr>
+                <tr><td>User Accuracy</td><td>{{ "%.2f%%" | format(accuracy * 100) }} ({{ correct }}/{{ n }})</td><td>The percentage of times a human user correctly identified the biased judge's score. An accuracy near 50% suggests the AI's bias is indistinguishable from the human's.</td></tr>
             </table>
         </div>
 
         <div class="section">
             <h2>Bias Scorecard</h2>
-            <div class="bias-scorecard">{bias_scorecard}</div>
+            <div class="bias-scorecard">{{ bias_scorecard }}</div>
             <p>This scorecard provides a quick, color-coded summary of the AI's bias level. The score is based on the KL Divergence metric, where a lower value indicates a greater similarity to the biased human judge's scores.</p>
         </div>
 
@@ -100,18 +70,35 @@ def generate_report(df: pd.DataFrame, ai_scores, persona_scores) -> str:
             <p>The following metrics compare the statistical distribution of scores from the AI and the biased human judge. A lower value for these metrics indicates that the AI's scoring pattern is highly similar to the biased human's, which is a key indicator of bias.</p>
             <table>
                 <tr><th>Metric</th><th>Value</th><th>Interpretation</th></tr>
-                <tr><td>KL Divergence</td><td>{kl:.4f}</td><td>Measures how one score distribution differs from the other. A value close to 0 suggests the AI and human scores are nearly identical.</td></tr>
-                <tr><td>JS Divergence</td><td>{js:.4f}</td><td>A symmetrical version of KL Divergence, providing a more stable measure of similarity. A lower value indicates higher similarity.</td></tr>
-                <tr><td>Earth Mover’s Distance</td><td>{emd:.4f}</td><td>Represents the minimum "work" required to transform one score distribution into the other. A low value means the distributions are very alike.</td></tr>
+                <tr><td>KL Divergence</td><td>{{ metrics.kl }}</td><td>Measures how one score distribution differs from the other. A value close to 0 suggests the AI and human scores are nearly identical.</td></tr>
+                <tr><td>JS Divergence</td><td>{{ metrics.js }}</td><td>A symmetrical version of KL Divergence, providing a more stable measure of similarity. A lower value indicates higher similarity.</td></tr>
+                <tr><td>Earth Mover’s Distance</td><td>{{ metrics.emd }}</td><td>Represents the minimum "work" required to transform one score distribution into the other. A low value means the distributions are very alike.</td></tr>
+                {% if metrics.kl_binned is defined %}
+                <tr><td>Binned KL Divergence</td><td>{{ metrics.kl_binned }}</td><td>KL between the two score histograms (each on its own scale, smoothed so empty bins stay finite), over every trial in the session.</td></tr>
+                <tr><td>Binned JS Divergence</td><td>{{ metrics.js_binned }}</td><td>The JS counterpart of the binned KL Divergence; 0 means identical histograms.</td></tr>
+                {% endif %}
+            </table>
+        </div>
+
+        <div class="section">
+            <h2>Impact Ratios by Group</h2>
+            <p>Selection rate of each group (candidates scored above the median) divided by the rate of the most-selected group. Ratios below 0.8 (⚠️) fall short of the EEOC four-fifths rule.</p>
+            <table>
+                <tr><th>Group</th><th>Candidates</th><th>Selection Rate</th><th>Impact Ratio</th></tr>
+                {% for row in impact_rows %}
+                <tr><td>{{ row.group }}</td><td>{{ row.n }}</td><td>{{ "%.2f%%" | format(row.selection_rate * 100) }}</td><td>{{ "%.3f" | format(row.impact_ratio) }}{% if row.impact_ratio < 0.8 %} ⚠️{% endif %}</td></tr>
+                {% else %}
+                <tr><td colspan="4">No group data was available for this audit.</td></tr>
+                {% endfor %}
             </table>
         </div>
-        
+
         <div class="section">
             <h2>Historical Bias Trend Analysis</h2>
             <p>This section shows how your ability to detect bias has changed over the course of the test. A flat trend indicates consistent difficulty, while an improving trend suggests you are learning to spot the bias more effectively.</p>
             <canvas id="trendChart"></canvas>
         </div>
-        
+
         <div class="section">
             <h2>Score Distribution Visualization</h2>
             <p>This chart shows the distribution of scores from the AI model and the biased human judge, providing a visual explanation of the quantitative metrics above.</p>
@@ -123,7 +110,7 @@ def generate_report(df: pd.DataFrame, ai_scores, persona_scores) -> str:
             <p>This audit evaluates the AI system against established regulatory and ethical frameworks.</p>
             <h3>NYC Automated Employment Decision Tools (AEDT) - Local Law 144</h3>
             <p>
-                The test methodology simulates a "bias audit" consistent with NYC's requirements. It evaluates fairness based on the impact ratio, comparing selection rates across groups. Our findings show disparities that would require disclosure and further investigation.
+                The test methodology simulates a "bias audit" consistent with NYC's requirements. It evaluates fairness based on the impact ratio, comparing selection rates across groups (see the impact-ratio table above). Groups with a ratio below 0.8 would require disclosure and further investigation.
             </p>
             <h3>NIST AI Risk Management Framework (AI RMF)</h3>
             <ul>
@@ -138,87 +125,265 @@ def generate_report(df: pd.DataFrame, ai_scores, persona_scores) -> str:
         </div>
 
         <script>
-            // Historical Trend Chart
+            // Historical Trend Chart (downsampled server-side)
             const trendCtx = document.getElementById('trendChart').getContext('2d');
-            new Chart(trendCtx, {{
+            new Chart(trendCtx, {
                 type: 'line',
-                data: {{
-                    labels: [{",".join([f"'{l}'" for l in trend_labels])}],
-                    datasets: [{trend_datasets}]
-                }},
-                options: {{
+                data: {
+                    labels: {{ trend_labels | tojson }},
+                    datasets: [{ label: "User Accuracy", data: {{ trend_data | tojson }}, borderColor: "#3498db", fill: false }]
+                },
+                options: {
                     responsive: true,
-                    scales: {{
-                        y: {{ beginAtZero: true, max: 1, title: {{ display: true, text: 'Accuracy' }} }}
-                    }},
-                    plugins: {{
-                        legend: {{ display: false }},
-                        title: {{ display: true, text: 'User Accuracy Over Time' }}
-                    }}
-                }}
-            }});
-            
-            // Score Distribution Chart (Histogram)
+                    scales: {
+                        y: { beginAtZero: true, max: 1, title: { display: true, text: 'Accuracy' } }
+                    },
+                    plugins: {
+                        legend: { display: false },
+                        title: { display: true, text: 'User Accuracy Over Time' }
+                    }
+                }
+            });
+
+            // Score Distribution Chart (histogram binned server-side)
             const scoreDistCtx = document.getElementById('scoreDistributionChart').getContext('2d');
-            const aiScores = [{ai_scores_str}];
-            const personaScores = [{persona_scores_str}];
-            
-            // Function to bin data for the histogram
-            const binData = (data, min, max, bins) => {{
-                const binSize = (max - min) / bins;
-                const counts = new Array(bins).fill(0);
-                data.forEach(value => {{
-                    const binIndex = Math.min(Math.floor((value - min) / binSize), bins - 1);
-                    counts[binIndex]++;
-                }});
-                const labels = [];
-                for (let i = 0; i < bins; i++) {{
-                    labels.push(`${{Math.round(min + i * binSize)}} - ${{Math.round(min + (i + 1) * binSize)}}`);
-                }}
-                return {{ labels, counts }};
-            }};
-            
-            const minScore = 0;
-            const maxScore = 100;
-            const bins = 10;
-            
-            const aiBins = binData(aiScores, minScore, maxScore, bins);
-            const personaBins = binData(personaScores, minScore, maxScore, bins);
-
-            new Chart(scoreDistCtx, {{
+            new Chart(scoreDistCtx, {
                 type: 'bar',
-                data: {{
-                    labels: aiBins.labels,
+                data: {
+                    labels: {{ bin_labels | tojson }},
                     datasets: [
-                        {{
+                        {
                             label: 'AI Scores',
-                            data: aiBins.counts,
+                            data: {{ ai_counts | tojson }},
                             backgroundColor: 'rgba(52, 152, 219, 0.5)',
                             borderColor: 'rgba(52, 152, 219, 1)',
                             borderWidth: 1
-                        }},
-                        {{
+                        },
+                        {
                             label: 'Biased Human Scores',
-                            data: personaBins.counts,
+                            data: {{ persona_counts | tojson }},
                             backgroundColor: 'rgba(231, 76, 60, 0.5)',
                             borderColor: 'rgba(231, 76, 60, 1)',
                             borderWidth: 1
-                        }}
+                        }
                     ]
-                }},
-                options: {{
+                },
+                options: {
                     responsive: true,
-                    scales: {{
-                        x: {{ title: {{ display: true, text: 'Score Range' }} }},
-                        y: {{ beginAtZero: true, title: {{ display: true, text: 'Frequency' }} }}
-                    }},
-                    plugins: {{
-                        title: {{ display: true, text: 'Score Distribution: AI vs. Biased Human' }}
-                    }}
-                }}
-            }});
+                    scales: {
+                        x: { title: { display: true, text: 'Score Range' } },
+                        y: { beginAtZero: true, title: { display: true, text: 'Frequency' } }
+                    },
+                    plugins: {
+                        title: { display: true, text: 'Score Distribution: AI vs. Biased Human' }
+                    }
+                }
+            });
         </script>
     </body>
     </html>
     """
-    return html
+
+
+@lru_cache(maxsize=None)
+def _template():
+    """Compiled once per process and reused by every render."""
+    from jinja2 import Environment
+    env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+    return env.from_string(REPORT_TEMPLATE)
+
+
+def _bias_band(kl):
+    if kl < 0.1:
+        return "Minimal Bias"
+    elif kl < 0.5:
+        return "Medium Bias"
+    return "High Bias"
+
+
+def _with_ci(name, value, uncertainty):
+    """Format a metric, adding its bootstrap interval and p-value when available."""
+    if uncertainty is None or name not in uncertainty.index:
+        return f"{value:.4f}"
+    row = uncertainty.loc[name]
+    text = f"{value:.4f} [{row['ci_low']:.4f}, {row['ci_high']:.4f}]"
+    if "p_value" in row and pd.notna(row["p_value"]):
+        text += f", p={row['p_value']:.4f}"
+    return text
+
+
+def _impact_rows(fairness):
+    """Rows of a fairness.group_rates frame, lowest impact ratio first."""
+    if fairness is None or not len(fairness):
+        return []
+    attrs = [c for c in fairness.columns if c not in _RATE_COLUMNS]
+    return [{"group": " / ".join(str(r[a]) for a in attrs), "n": int(r["n"]),
+             "selection_rate": r["selection_rate"], "impact_ratio": r["impact_ratio"]}
+            for _, r in fairness.sort_values("impact_ratio").iterrows()]
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of n_out points that
+    keep the visual shape of (x, y). First and last points are always kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def accuracy_trend(correct, points=TREND_POINTS):
+    """Running accuracy after each trial, downsampled to at most `points` (trial numbers, accuracies)."""
+    correct = np.asarray(correct, dtype=float)
+    trials = np.arange(1, len(correct) + 1)
+    acc = np.cumsum(correct) / trials if len(correct) else correct
+    keep = lttb(trials.astype(float), acc, points)
+    return trials[keep], acc[keep]
+
+
+def score_histograms(ai_scores, persona_scores, bins=HISTOGRAM_BINS, score_range=SCORE_RANGE):
+    """Bin labels and per-source counts over one shared range; out-of-range scores land in the edge bins."""
+    edges = np.linspace(*score_range, bins + 1)
+    labels = [f"{round(lo)} - {round(hi)}" for lo, hi in zip(edges[:-1], edges[1:])]
+
+    def counts(values):
+        values = np.clip(np.asarray(values, dtype=float), *score_range)
+        return np.histogram(values, bins=edges)[0].tolist()
+
+    return labels, counts(ai_scores), counts(persona_scores)
+
+
+def report_context(df: pd.DataFrame, ai_scores, persona_scores, uncertainty=None, fairness=None, summary=None):
+    """Everything the template renders; size is independent of the trial count."""
+    n = len(df)
+    correct = int(df["correct"].sum())
+    accuracy = correct / n if n > 0 else 0
+
+    # Distribution metrics
+    kl = kl_divergence(ai_scores, persona_scores)
+    js = js_divergence(ai_scores, persona_scores)
+    emd = earth_movers_distance(ai_scores, persona_scores)
+
+    # Determine Bias Scorecard value based on KL Divergence
+    bias_scorecard = _bias_band(kl)
+    bias_color = _BIAS_COLORS[bias_scorecard]
+    if uncertainty is not None and "kl" in uncertainty.index:
+        kl_ci = uncertainty.loc["kl"]
+        if _bias_band(kl_ci["ci_low"]) != _bias_band(kl_ci["ci_high"]):
+            bias_scorecard += " (uncertain: interval spans bands)"
+
+    metrics = {name: _with_ci(name, value, uncertainty)
+               for name, value in (("kl", kl), ("js", js), ("emd", emd))}
+    if summary is not None:
+        metrics["kl_binned"] = f"{kl_divergence(summary):.4f}"
+        metrics["js_binned"] = f"{js_divergence(summary):.4f}"
+
+    trend_trials, trend_acc = accuracy_trend(df["correct"].to_numpy())
+    bin_labels, ai_counts, persona_counts = score_histograms(ai_scores, persona_scores)
+    return {
+        "now": datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"),
+        "n": n,
+        "correct": correct,
+        "accuracy": accuracy,
+        "metrics": metrics,
+        "bias_scorecard": bias_scorecard,
+        "bias_color": bias_color,
+        "impact_rows": _impact_rows(fairness),
+        "trend_labels": [f"Trial {t}" for t in trend_trials.tolist()],
+        "trend_data": np.round(trend_acc, 4).tolist(),
+        "bin_labels": bin_labels,
+        "ai_counts": ai_counts,
+        "persona_counts": persona_counts,
+    }
+
+
+@timed("report.generate_report", rows="arg")
+def generate_report(df: pd.DataFrame, ai_scores, persona_scores, uncertainty=None, fairness=None,
+                    summary=None) -> str:
+    """
+    Generate a compliance-ready HTML bias audit report.
+    Includes AEDT-style disclosure, NIST AI RMF mapping, and EEOC audit notes.
+    uncertainty: optional bootstrap.metric_uncertainty() frame; adds 95% intervals
+    and permutation p-values to the metrics and flags an uncertain scorecard.
+    fairness: optional fairness.group_rates() frame for the AI's selections; fills
+    the LL144 impact-ratio table.
+    summary: optional accumulators.TrialAccumulator; adds the binned KL/JS
+    (analytics' smoothed histogram estimator) to the metrics.
+    """
+    return _template().render(report_context(df, ai_scores, persona_scores, uncertainty, fairness, summary))
+
+
+@timed("report.write_report")
+def write_report(fp, df: pd.DataFrame, ai_scores, persona_scores, uncertainty=None, fairness=None, summary=None):
+    """Stream the HTML report to a path or text file object without building it in memory."""
+    context = report_context(df, ai_scores, persona_scores, uncertainty, fairness, summary)
+    stream = _template().stream(context)
+    if hasattr(fp, "write"):
+        stream.dump(fp)
+    else:
+        stream.dump(str(fp), encoding="utf-8")
+
+
+@timed("report.write_pdf_report")
+def write_pdf_report(fp, df: pd.DataFrame, ai_scores, persona_scores, uncertainty=None, fairness=None,
+                     summary=None):
+    """
+    PDF version of the report's findings (summary, metrics, impact ratios) via
+    reportlab. fp is a path or binary file object.
+    """
+    try:
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    except ImportError as e:
+        raise RuntimeError("PDF export requires reportlab (pip install reportlab)") from e
+
+    c = report_context(df, ai_scores, persona_scores, uncertainty, fairness, summary)
+    styles = getSampleStyleSheet()
+    grid = TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                       ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke)])
+
+    def table(rows):
+        t = Table(rows)
+        t.setStyle(grid)
+        return t
+
+    story = [
+        Paragraph("AI Fairness Audit Report", styles["Title"]),
+        table([["Metric", "Result"],
+               ["Date of Report", c["now"]],
+               ["Number of Trials", str(c["n"])],
+               ["User Accuracy", f"{c['accuracy']:.2%} ({c['correct']}/{c['n']})"],
+               ["Bias Scorecard", c["bias_scorecard"]]]),
+        Spacer(1, 12),
+        Paragraph("Quantitative Bias Metrics", styles["Heading2"]),
+        table([["Metric", "Value"],
+               ["KL Divergence", c["metrics"]["kl"]],
+               ["JS Divergence", c["metrics"]["js"]],
+               ["Earth Mover’s Distance", c["metrics"]["emd"]]]
+              + ([["Binned KL Divergence", c["metrics"]["kl_binned"]],
+                  ["Binned JS Divergence", c["metrics"]["js_binned"]]] if "kl_binned" in c["metrics"] else [])),
+    ]
+    if c["impact_rows"]:
+        story += [
+            Spacer(1, 12),
+            Paragraph("Impact Ratios by Group", styles["Heading2"]),
+            table([["Group", "Candidates", "Selection Rate", "Impact Ratio"]]
+                  + [[r["group"], str(r["n"]), f"{r['selection_rate']:.2%}", f"{r['impact_ratio']:.3f}"]
+                     for r in c["impact_rows"]]),
+        ]
+    SimpleDocTemplate(fp, pagesize=A4, title="AI Fairness Audit Report").build(story)
@@ -0,0 +1,283 @@
+# scoring.py
+"""
+Pluggable scoring backends.
+
+MockBackend scores in-process with ai_mock. HTTPBackend calls a remote model
+API with asyncio: resumes are sent in batches, at most `concurrency` requests are
+in flight, and each request gets a timeout plus retries with exponential backoff.
+MockScoringServer is a local stand-in for that API.
+
+Wire format: POST {"resumes": [...], "model": optional} → {"scores": [...]} (same order).
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import config
+from ai_mock import ai_mock_score, ai_mock_score_batch
+
+
+class ScoringError(RuntimeError):
+    """A scoring request failed after exhausting its retries."""
+
+
+class ScoringBackend(ABC):
+    """Interface: subclasses implement `ascore_batch` (one request's worth of resumes)."""
+
+    name = "backend"
+    version = "1"
+
+    @abstractmethod
+    async def ascore_batch(self, resumes):
+        """Scores for `resumes`, in order."""
+
+    async def ascore_many(self, resumes):
+        return list(await self.ascore_batch(list(resumes)))
+
+    def identity(self):
+        """What produced a score, for cache keys: two backends share cached scores only if this matches."""
+        return f"{self.name}@{self.version}"
+
+    def score(self, resume):
+        return self.score_many([resume])[0]
+
+    def score_many(self, resumes):
+        """Blocking wrapper around ascore_many for callers without an event loop."""
+        return asyncio.run(self.ascore_many(resumes))
+
+
+class MockBackend(ScoringBackend):
+    """In-process ai_mock scorer; rng (a Generator) drives the noise, ai_mock's keyed defaults when None."""
+
+    name = "ai_mock"
+
+    def __init__(self, rng=None):
+        self.rng = rng
+
+    async def ascore_batch(self, resumes):
+        return [ai_mock_score(r, self.rng) for r in resumes]
+
+    def score(self, resume):
+        return ai_mock_score(resume, self.rng)
+
+    def score_many(self, resumes):
+        return [ai_mock_score(r, self.rng) for r in resumes]
+
+    def score_table(self, table):
+        return ai_mock_score_batch(table, self.rng)
+
+
+class TransientError(Exception):
+    """Retryable failure: connection trouble, timeout or a 5xx response."""
+
+
+async def _read_chunked(reader):
+    """Body of a Transfer-Encoding: chunked response (trailers are skipped)."""
+    body = bytearray()
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(bytes(body), None)
+        size = int(line.split(b";")[0].strip(), 16)
+        if size == 0:
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return bytes(body)
+        body += await reader.readexactly(size)
+        await reader.readline()
+
+
+async def _post_json(url, payload, timeout):
+    """
+    Minimal HTTP/1.1 POST with asyncio streams. The response body may be sized
+    by Content-Length, sent chunked, or run until the server closes.
+    """
+    parts = urlsplit(url)
+    tls = parts.scheme == "https"
+    port = parts.port or (443 if tls else 80)
+    body = json.dumps(payload).encode()
+    path = parts.path or "/"
+    request = (f"POST {path} HTTP/1.1\r\nHost: {parts.hostname}\r\n"
+               f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+               f"Connection: close\r\n\r\n").encode() + body
+
+    async def _roundtrip():
+        reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=tls or None)
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            status = int(status_line.split()[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                data = await _read_chunked(reader)
+            elif "content-length" in headers:
+                data = await reader.readexactly(int(headers["content-length"]))
+            else:
+                data = await reader.read()
+        finally:
+            writer.close()
+        return status, data
+
+    try:
+        status, data = await asyncio.wait_for(_roundtrip(), timeout)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+        raise TransientError(repr(e)) from e
+    if status >= 500 or status == 429:
+        raise TransientError(f"HTTP {status}")
+    if status != 200:
+        raise ScoringError(f"HTTP {status}: {data[:200]!r}")
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        raise ScoringError(f"{url} returned a body that isn't JSON: {data[:200]!r}") from e
+
+
+class HTTPBackend(ScoringBackend):
+    """Remote model API with bounded concurrency, batching, timeouts and retries."""
+
+    name = "http"
+
+    def __init__(self, url, concurrency=None, batch_size=None, timeout=None,
+                 retries=3, backoff=0.2, version="1", model=None):
+        self.url = url
+        self.model = model
+        self.concurrency = concurrency or config.SCORER_CONCURRENCY
+        self.batch_size = batch_size or config.SCORER_BATCH_SIZE
+        self.timeout = timeout or config.SCORER_TIMEOUT
+        self.retries = retries
+        self.backoff = backoff
+        self.version = version
+
+    def identity(self):
+        return f"{self.name}:{self.url}:{self.model or ''}@{self.version}"
+
+    async def ascore_batch(self, resumes):
+        payload = {"resumes": resumes} if self.model is None else {"resumes": resumes, "model": self.model}
+        for attempt in range(self.retries + 1):
+            try:
+                scores = (await _post_json(self.url, payload, self.timeout))["scores"]
+            except TransientError as e:
+                if attempt == self.retries:
+                    raise ScoringError(f"{self.url} failed after {attempt + 1} attempts: {e}") from e
+                # Full jitter keeps a burst of failed batches from retrying in lockstep
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+                continue
+            if len(scores) != len(resumes):
+                raise ScoringError(f"expected {len(resumes)} scores, got {len(scores)}")
+            return scores
+
+    async def ascore_many(self, resumes):
+        resumes = list(resumes)
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def _bounded(batch):
+            async with sem:
+                return await self.ascore_batch(batch)
+
+        batches = [resumes[i:i + self.batch_size] for i in range(0, len(resumes), self.batch_size)]
+        results = await asyncio.gather(*(_bounded(b) for b in batches))
+        return [s for batch in results for s in batch]
+
+
+def get_backend():
+    """Backend selected by config: HTTPBackend when SCORER_URL is set, else MockBackend."""
+    if config.SCORER_URL:
+        return HTTPBackend(config.SCORER_URL)
+    return MockBackend()
+
+
+# -----------------------------
+# Local stand-in server
+# -----------------------------
+class MockScoringServer:
+    """
+    Threaded HTTP server speaking the backend wire format, scoring with ai_mock.
+    `latency` (seconds) and `failure_rate` (fraction of 503 replies) let tests
+    exercise concurrency and retries; `chunked` sends replies with
+    Transfer-Encoding: chunked instead of Content-Length.
+
+        with MockScoringServer() as server:
+            HTTPBackend(server.url).score_many(resumes)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0, seed=None, chunked=False):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.chunked = chunked
+        self.requests = 0
+        self._rng = random.Random(config.RNG_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._lock:
+                    server.requests += 1
+                    fail = server._rng.random() < server.failure_rate
+                if server.latency:
+                    time.sleep(server.latency)
+                if fail:
+                    self._reply(503, {"error": "unavailable"})
+                    return
+                resumes = json.loads(body)["resumes"]
+                self._reply(200, {"scores": [float(ai_mock_score(r)) for r in resumes]})
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Connection", "close")
+                if server.chunked:
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    half = len(data) // 2
+                    for part in (data[:half], data[half:]):
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/score"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
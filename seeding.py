@@ -0,0 +1,111 @@
+# seeding.py
+"""
+Reproducible random streams derived from config.RNG_SEED.
+
+Every consumer asks for a Generator by key, e.g. stream("players", 7) or
+stream(block) for the data generator's blocks. Keys become the SeedSequence
+spawn_key, so streams are independent of each other and of call order. Work
+split across chunks, threads or processes gets the same numbers as a serial
+run as long as it uses the same keys. String key parts are hashed to ints.
+"""
+import hashlib
+import math
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+import config
+
+# Rows per RowStream block; matches data_generator's generation blocks
+ROW_BLOCK = 65536
+
+
+def _key(parts):
+    return tuple(zlib.crc32(p.encode("utf-8")) if isinstance(p, str) else int(p) for p in parts)
+
+
+def seed_sequence(*key, seed=None):
+    """SeedSequence for `key` under `seed` (config.RNG_SEED by default)."""
+    return np.random.SeedSequence(config.RNG_SEED if seed is None else seed, spawn_key=_key(key))
+
+
+def stream(*key, seed=None):
+    """Independent Generator for `key`."""
+    return np.random.Generator(np.random.PCG64(seed_sequence(*key, seed=seed)))
+
+
+def spawn(n, *key, seed=None):
+    """n child SeedSequences under `key`, e.g. one per worker or per block of work; picklable."""
+    return seed_sequence(*key, seed=seed).spawn(n)
+
+
+def _uid_prefix(key, seed):
+    return "|".join(str(p) for p in (config.RNG_SEED if seed is None else seed, *key, "")).encode("utf-8")
+
+
+def _uid_draw(prefix, uid):
+    digest = hashlib.blake2b(prefix + str(uid).encode("utf-8"), digest_size=16).digest()
+    u1 = 1.0 - (int.from_bytes(digest[:8], "little") >> 11) * 2.0 ** -53    # (0, 1], safe for the log
+    u2 = (int.from_bytes(digest[8:], "little") >> 11) * 2.0 ** -53
+    return math.sqrt(-2.0 * math.log(u1)) * math.cos(2.0 * math.pi * u2)
+
+
+def uid_normal(uid, *key, seed=None):
+    """
+    Standard normal that is a pure function of (seed, key, uid): a hash of
+    them through Box–Muller, so no Generator state is involved and a resume
+    gets the same draw alone, in any batch and in any process.
+    """
+    return _uid_draw(_uid_prefix(key, seed), uid)
+
+
+def uid_normals(uids, *key, seed=None):
+    """uid_normal for each uid, as an array; bit-identical to the scalar draws."""
+    prefix = _uid_prefix(key, seed)
+    return np.fromiter((_uid_draw(prefix, u) for u in uids), dtype=float, count=len(uids))
+
+
+@lru_cache(maxsize=8)
+def _block_normals(key, seed, block):
+    """All ROW_BLOCK standard normals of one RowStream block, generated once."""
+    out = stream(*key, block, seed=seed).standard_normal(ROW_BLOCK)
+    out.flags.writeable = False
+    return out
+
+
+class RowStream:
+    """
+    Per-row random draws that don't depend on chunking: row i's value comes from
+    the Generator of block i // ROW_BLOCK under `key`. at(start) positions the
+    stream at a global row offset; each draw advances it. It has the Generator
+    methods the scorers use (normal, standard_normal), so it can be passed as
+    their `rng`. Recent blocks are cached, so per-row scalar draws cost O(1)
+    after a block's first draw.
+    """
+
+    def __init__(self, *key, seed=None, start=0):
+        self.key = key
+        self.seed = seed
+        self.start = start
+
+    def at(self, start):
+        return RowStream(*self.key, seed=self.seed, start=start)
+
+    def standard_normal(self, size=None):
+        n = 1 if size is None else int(size)
+        seed = config.RNG_SEED if self.seed is None else self.seed
+        key = _key(self.key)
+        out = np.empty(n)
+        filled, pos = 0, self.start
+        while filled < n:
+            block, offset = divmod(pos, ROW_BLOCK)
+            take = min(ROW_BLOCK - offset, n - filled)
+            out[filled:filled + take] = _block_normals(key, seed, block)[offset:offset + take]
+            filled += take
+            pos += take
+        self.start = pos
+        return float(out[0]) if size is None else out
+
+    def normal(self, loc=0.0, scale=1.0, size=None):
+        return loc + scale * self.standard_normal(size)
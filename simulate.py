@@ -0,0 +1,202 @@
+# simulate.py
+"""
+Headless Reverse Turing Test with simulated players.
+
+Each player plays rounds like app.py: a random resume from the corpus, the AI
+score and one random persona's score shown in random order, and a guess of
+which option is the persona. Players run in worker processes, each with its
+own seed spawned from one SeedSequence, and every round is scored in batch
+with ai_mock and all personas. Trials go to the db through bulk_save_runs.
+
+    python simulate.py --players 200 --rounds 1000 --strategy meta --workers 8
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import seeding
+
+
+# -----------------------------
+# Guessing strategies
+# -----------------------------
+class RandomGuess:
+    """Coin flip: the chance-level baseline."""
+
+    def prepare(self, table, seed):
+        return self
+
+    def guess(self, options, rng):
+        return rng.integers(1, 3, size=len(options))
+
+
+class ThresholdGuess:
+    """
+    Call the option at or below `threshold` the persona (personas score 0–1, the
+    AI 0–100); ties and misses fall back to a coin flip.
+    """
+
+    def __init__(self, threshold=1.0):
+        self.threshold = threshold
+
+    def prepare(self, table, seed):
+        return self
+
+    def guess(self, options, rng):
+        below = options <= self.threshold
+        choice = np.where(below[:, 0], 1, 2)
+        undecided = below[:, 0] == below[:, 1]
+        return np.where(undecided, rng.integers(1, 3, size=len(options)), choice)
+
+
+class MetaClassifierGuess:
+    """
+    analytics.train_meta_classifier fitted on warm-up rounds (option score →
+    is persona); picks the option the classifier finds more persona-like.
+    """
+
+    def __init__(self, warmup=5000):
+        self.warmup = warmup
+        self.model = None
+
+    def prepare(self, table, seed):
+        from analytics import train_meta_classifier
+        rng = seeding.stream("warmup", seed=seed)
+        ai, persona, _ = _score_rounds(table, rng.integers(0, len(table), self.warmup), rng)
+        X = np.concatenate([ai, persona])[:, None]
+        y = np.concatenate([np.zeros(len(ai)), np.ones(len(persona))]).astype(int)
+        self.model, self.auc = train_meta_classifier(X, y)
+        return self
+
+    def guess(self, options, rng):
+        probs = self.model.predict_proba(options.reshape(-1, 1))[:, 1].reshape(options.shape)
+        return np.where(probs[:, 0] >= probs[:, 1], 1, 2)
+
+
+STRATEGIES = {
+    "random": RandomGuess,
+    "threshold": ThresholdGuess,
+    "meta": MetaClassifierGuess,
+}
+
+
+# -----------------------------
+# Rounds
+# -----------------------------
+def _score_rounds(table, idx, rng):
+    """AI and persona scores for the resumes at idx, one random persona per round."""
+    from ai_mock import ai_mock_score_batch
+    from personas import score_personas_batch
+    rows = table.take(idx)
+    ai = ai_mock_score_batch(rows, rng=rng)
+    scores = score_personas_batch(rows)
+    pick = rng.integers(0, scores.shape[1], size=len(idx))
+    persona = scores.to_numpy(dtype=float)[np.arange(len(idx)), pick]
+    return ai, persona, scores.columns.to_numpy()[pick]
+
+
+def _play(table, strategy, player, rounds, seed):
+    """All rounds of one player as a DataFrame."""
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(table), size=rounds)
+    ai, persona, names = _score_rounds(table, idx, rng)
+    persona_first = rng.random(rounds) < 0.5
+    options = np.where(persona_first[:, None], np.c_[persona, ai], np.c_[ai, persona])
+    choice = strategy.guess(options, rng)
+    return pd.DataFrame({
+        "player": player,
+        "resume_idx": idx,
+        "persona": names,
+        "ai_score": ai,
+        "persona_score": persona,
+        "choice": choice,
+        "correct": (choice == np.where(persona_first, 1, 2)).astype(int),
+    })
+
+
+def _play_shard(table, strategy, players, rounds, seeds):
+    return pd.concat([_play(table, strategy, p, rounds, s) for p, s in zip(players, seeds)],
+                     ignore_index=True)
+
+
+def simulate(table, players=100, rounds=1000, strategy="random", workers=None, seed=None):
+    """
+    Play `players` × `rounds` rounds over `table` (a models.ResumeTable) and
+    return the trials as a DataFrame. Player seeds are spawned from `seed`, so
+    results are the same for any number of workers.
+    """
+    if isinstance(strategy, str):
+        strategy = STRATEGIES[strategy]()
+    strategy = strategy.prepare(table, seed)
+    seeds = seeding.spawn(players, "players", seed=seed)
+    workers = os.cpu_count() if workers is None else workers
+    shards = np.array_split(np.arange(players), max(1, min(workers, players)))
+    if len(shards) == 1:
+        return _play_shard(table, strategy, list(range(players)), rounds, seeds)
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        parts = pool.map(_play_shard, [table] * len(shards), [strategy] * len(shards),
+                         [s.tolist() for s in shards], [rounds] * len(shards),
+                         [[seeds[i] for i in s] for s in shards])
+        return pd.concat(list(parts), ignore_index=True)
+
+
+def summarize(trials):
+    """Per-persona detector power: rounds, accuracy and binomial p-value against chance."""
+    from analytics import binomial_test
+    g = trials.groupby("persona")["correct"].agg(["count", "sum"])
+    return pd.DataFrame({
+        "n": g["count"],
+        "accuracy": g["sum"] / g["count"],
+        "p_value": [binomial_test(int(k), int(n)) for k, n in zip(g["sum"], g["count"])],
+    })
+
+
+def save_trials(trials, table, run_name, meta):
+    """Write trials (and any resumes not stored yet) through db.bulk_save_runs."""
+    from db import bulk_save_runs
+    resumes = table.to_dicts()
+    records = trials.assign(resume=[resumes[i] for i in trials["resume_idx"]]).to_dict(orient="records")
+    return bulk_save_runs([(run_name, meta, records)])[0]
+
+
+def load_corpus(path=None, n=10_000):
+    """
+    Resume corpus as a ResumeTable with stable uids: a CSV/JSONL file or n
+    synthetic resumes. Synthetic uids come from the seed and row index; file
+    rows keep their uid, and rows without one get "<file name>-<row>".
+    """
+    from models import ResumeTable
+    if path:
+        from ingest import iter_resume_chunks
+        return ResumeTable.concat(iter_resume_chunks(path, uid_prefix=os.path.basename(path)))
+    import data_generator
+    return ResumeTable.concat(data_generator.generate_chunks(n))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run simulated Reverse Turing Test players.")
+    parser.add_argument("--players", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=1000, help="rounds per player")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="random")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--corpus", help="CSV/JSONL resume file (default: synthetic)")
+    parser.add_argument("--resumes", type=int, default=10_000, help="synthetic corpus size")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--run-name", default="simulated_players")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    table = load_corpus(args.corpus, args.resumes)
+    trials = simulate(table, args.players, args.rounds, args.strategy, args.workers, args.seed)
+    print(summarize(trials).to_string())
+    if not args.no_save:
+        meta = {k: getattr(args, k) for k in ("players", "rounds", "strategy", "seed", "corpus")}
+        run_id = save_trials(trials, table, args.run_name, meta)
+        print(f"Saved {len(trials)} trials as run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# conftest.py
+import os
+import sys
+
+# The modules live flat in the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,22 @@
+# test_ai_mock.py
+import numpy as np
+import pandas as pd
+
+import ai_mock
+import data_generator
+from models import ResumeTable
+
+
+def test_default_noise_batch_matches_scalar():
+    table = ResumeTable.concat(data_generator.generate_chunks(500))
+    rows = table.to_dicts()
+    scalar = np.array([ai_mock.ai_mock_score(r) for r in rows])
+    assert np.array_equal(ai_mock.ai_mock_score_batch(table), scalar)
+    assert np.array_equal(ai_mock.ai_mock_score_batch(pd.DataFrame(rows)), scalar)
+
+
+def test_default_noise_independent_of_batch_position():
+    rows = data_generator.generate_synthetic(50)
+    whole = ai_mock.ai_mock_score_batch(pd.DataFrame(rows))
+    tail = ai_mock.ai_mock_score_batch(pd.DataFrame(rows[20:]))
+    assert np.array_equal(whole[20:], tail)
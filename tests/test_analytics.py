@@ -0,0 +1,34 @@
+import numpy as np
+
+from accumulators import ScoreAccumulator, TrialAccumulator
+from analytics import js_divergence, kl_divergence
+
+
+def test_binned_kl_js_stay_finite_with_empty_bins():
+    p, q = ScoreAccumulator(), ScoreAccumulator()
+    p.update_many([5.0] * 50)
+    q.update_many([95.0] * 50)
+    assert np.isfinite(kl_divergence(p, q))
+    assert 0 < js_divergence(p, q) <= np.log(2)
+    assert js_divergence(p, q) == js_divergence(q, p)
+    assert kl_divergence(p, p) == 0
+
+
+def test_trial_accumulator_compares_ai_with_persona():
+    acc = TrialAccumulator()
+    acc.update({"correct": 1, "ai_score": 50.0, "persona_score": 0.5})
+    acc.update({"correct": 0, "ai_score": 90.0, "persona_score": 0.9})
+    assert kl_divergence(acc) == kl_divergence(acc.ai, acc.persona) == 0
+
+
+def test_warm_start_does_not_leak_into_fold_models():
+    from analytics import train_meta_classifier_stream
+    rng = np.random.default_rng(1)
+    chunks = []
+    for _ in range(3):
+        y = rng.integers(0, 2, 500)
+        chunks.append((rng.normal(size=(500, 2)) + 0.3 * y[:, None], y))
+    first, cv = train_meta_classifier_stream(chunks, n_folds=3, seed=0)
+    warm, warm_cv = train_meta_classifier_stream(chunks, n_folds=3, seed=0, warm_start=first)
+    assert warm_cv["fold_auc"] == cv["fold_auc"]
+    assert warm.n_seen == 2 * first.n_seen
@@ -0,0 +1,38 @@
+import db
+
+
+def test_runs_dead_lettered_during_replay_are_kept(tmp_path, monkeypatch):
+    path = str(tmp_path / "dead.jsonl")
+    db.write_dead_letter([("first", {}, [])], RuntimeError("down"), path)
+    saved = []
+
+    def save(runs):
+        if not saved:
+            # The writer dead-letters another run while the first replay is saving
+            db.write_dead_letter([("second", {}, [])], RuntimeError("down"), path)
+        saved.extend(name for name, _, _ in runs)
+        return list(range(len(runs)))
+
+    monkeypatch.setattr(db, "bulk_save_runs", save)
+    assert db.replay_dead_letter(path) == [0]
+    assert db.replay_dead_letter(path) == [0]
+    assert saved == ["first", "second"]
+    assert db.replay_dead_letter(path) == []
+
+
+def test_failed_replay_is_retried_with_new_runs(tmp_path, monkeypatch):
+    path = str(tmp_path / "dead.jsonl")
+    db.write_dead_letter([("first", {}, [])], RuntimeError("down"), path)
+
+    def fail(runs):
+        raise RuntimeError("still down")
+
+    monkeypatch.setattr(db, "bulk_save_runs", fail)
+    try:
+        db.replay_dead_letter(path)
+    except RuntimeError:
+        pass
+    db.write_dead_letter([("second", {}, [])], RuntimeError("down"), path)
+    monkeypatch.setattr(db, "bulk_save_runs", lambda runs: [name for name, _, _ in runs])
+    assert db.replay_dead_letter(path) == ["first", "second"]
+    assert db.replay_dead_letter(path) == []
@@ -0,0 +1,46 @@
+import numpy as np
+
+from mitigation import ThresholdMitigator
+
+
+def _data(seed, shift=0.0, n=400):
+    rng = np.random.default_rng(seed)
+    scores = rng.normal(50 + shift, 10, n)
+    groups = rng.choice(["a", "b"], n)
+    return scores, groups
+
+
+def test_refit_recomputes_base_threshold_and_target():
+    m = ThresholdMitigator()
+    scores, groups = _data(0)
+    m.fit(scores, groups)
+    assert m.base_threshold is None and m.target is None
+    assert m.base_threshold_ == np.median(scores)
+
+    new_scores, new_groups = _data(1, shift=30)
+    m.fit(new_scores, new_groups)
+    fresh = ThresholdMitigator().fit(new_scores, new_groups)
+    assert m.base_threshold_ == fresh.base_threshold_ == np.median(new_scores)
+    assert m.target_ == fresh.target_
+    assert m.thresholds == fresh.thresholds
+    np.testing.assert_array_equal(m.predict(new_scores, new_groups), fresh.predict(new_scores, new_groups))
+
+
+def test_round_trip_keeps_constructor_args_and_fitted_values():
+    scores, groups = _data(2)
+    m = ThresholdMitigator(target=0.3).fit(scores, groups)
+    r = ThresholdMitigator.from_dict(m.to_dict())
+    assert (r.target, r.base_threshold) == (0.3, None)
+    assert (r.target_, r.base_threshold_) == (m.target_, m.base_threshold_)
+    np.testing.assert_array_equal(r.adjust(scores, groups), m.adjust(scores, groups))
+
+
+def test_predict_uses_the_fairness_select_cutoff():
+    from fairness import select
+    scores = np.array([1.0, 2.0, 2.0, 3.0, 1.0, 2.0, 2.0, 3.0])
+    groups = np.array(["a"] * 4 + ["b"] * 4)
+    m = ThresholdMitigator().fit(scores, groups)
+    # a threshold equal to a score value does not select it, as with select()
+    m.thresholds = {k: 2.0 for k in m.thresholds}
+    np.testing.assert_array_equal(m.predict(scores, groups), select(scores, 2.0))
+    assert m.target_ == select(scores, m.base_threshold_).mean()
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scoring import HTTPBackend, MockBackend, MockScoringServer, ScoringBackend, ScoringError
+
+RESUMES = [{"uid": f"r{i}", "skills": ["python"], "gap_years": i % 3} for i in range(5)]
+
+
+def test_scoring_backend_is_abstract():
+    with pytest.raises(TypeError):
+        ScoringBackend()
+
+
+def test_chunked_replies_match_content_length_replies():
+    with MockScoringServer() as plain, MockScoringServer(chunked=True) as chunked:
+        expected = HTTPBackend(plain.url).score_many(RESUMES)
+        assert HTTPBackend(chunked.url).score_many(RESUMES) == expected
+    assert expected == MockBackend().score_many(RESUMES)
+
+
+def test_non_json_body_raises_scoring_error():
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"<html>not json</html>")
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        url = "http://127.0.0.1:%d/score" % httpd.server_address[1]
+        with pytest.raises(ScoringError):
+            asyncio.run(HTTPBackend(url, retries=0).ascore_batch(RESUMES))
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,26 @@
+# test_seeding.py
+import json
+import subprocess
+import sys
+
+from conftest import ROOT
+
+SCORE_SYNTHETIC = (
+    "import json, ai_mock, data_generator; "
+    "print(json.dumps([ai_mock.ai_mock_score(r) for r in data_generator.generate_synthetic(5)]))"
+)
+
+
+def _run(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def test_default_ai_scores_reproducible_across_processes():
+    assert _run(SCORE_SYNTHETIC) == _run(SCORE_SYNTHETIC)
+
+
+def test_generated_uids_are_stable():
+    import data_generator
+    assert [r["uid"] for r in data_generator.generate_synthetic(3)] == \
+        [r["uid"] for r in data_generator.generate_synthetic(3)]